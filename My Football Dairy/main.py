@@ -7,6 +7,7 @@ from kivy.core.window import Window
 
 class FootballApp(MDApp):
     current_user = None  # Property to store the currently logged-in user
+    prefetcher = None  # Background cache warmer started on login
 
     def build(self):
         Window.size = (400, 750)
@@ -31,5 +32,20 @@ class FootballApp(MDApp):
         sm.current = 'login'
         return sm
 
+    def on_pause(self):
+        self._flush_draft()
+        return True
+
+    def on_stop(self):
+        self._flush_draft()
+
+    def _flush_draft(self):
+        # Push any buffered draft journal records to disk before the OS can kill us
+        add_stat = self.root.get_screen('add_stat') if self.root else None
+        if add_stat:
+            add_stat.events.flush()  # taps still waiting for the next frame
+        if add_stat and add_stat.journal:
+            add_stat.journal.flush()
+
 if __name__ == '__main__':
     FootballApp().run()
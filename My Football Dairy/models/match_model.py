@@ -1 +1,124 @@
-# match_model.py
\ No newline at end of file
+# models/match_model.py
+#
+# Helpers for a single saved session. Two stats schemas exist on disk: older
+# files carry calculated_xg/calculated_xa/total_shots, newer ones total_xg/total_xa.
+import hashlib
+import json
+
+SHOT_TYPES = ('shot_on', 'shot_off', 'goal')
+
+# --- Data for Formations and Roles (Inspired by FM24) ---
+
+# Coordinates are (rel_x, rel_y) from 0.0 to 1.0, where (0,0) is bottom-left
+FORMATION_DATA = {
+    "4-4-2": {
+        "GK": (0.5, 0.08),
+        "RB": (0.85, 0.22), "RCB": (0.65, 0.2), "LCB": (0.35, 0.2), "LB": (0.15, 0.22),
+        "RM": (0.8, 0.5), "RCM": (0.6, 0.5), "LCM": (0.4, 0.5), "LM": (0.2, 0.5),
+        "RS": (0.6, 0.8), "LS": (0.4, 0.8)
+    },
+    "4-3-3": {
+        "GK": (0.5, 0.08),
+        "RB": (0.85, 0.25), "RCB": (0.65, 0.2), "LCB": (0.35, 0.2), "LB": (0.15, 0.25),
+        "DM": (0.5, 0.35), "RCM": (0.7, 0.55), "LCM": (0.3, 0.55),
+        "RW": (0.8, 0.78), "ST": (0.5, 0.82), "LW": (0.2, 0.78)
+    },
+    "3-5-2": {
+        "GK": (0.5, 0.08),
+        "RCB": (0.7, 0.2), "CB": (0.5, 0.2), "LCB": (0.3, 0.2),
+        "RWB": (0.85, 0.45), "RCM": (0.65, 0.5), "CDM": (0.5, 0.38), "LCM": (0.35, 0.5), "LWB": (0.15, 0.45),
+        "RS": (0.6, 0.8), "LS": (0.4, 0.8)
+    },
+    "5-3-2": {
+        "GK": (0.5, 0.08),
+        "RWB": (0.9, 0.35), "RCB": (0.7, 0.2), "CB": (0.5, 0.2), "LCB": (0.3, 0.2), "LWB": (0.1, 0.35),
+        "RCM": (0.65, 0.55), "CM": (0.5, 0.5), "LCM": (0.35, 0.55),
+        "RS": (0.6, 0.8), "LS": (0.4, 0.8)
+    }
+}
+
+# Maps a generic position type to a list of available roles
+POSITION_ROLES = {
+    "GK": ["Goalkeeper", "Sweeper Keeper", "Other"],
+    "FB": ["Full-Back", "Wing-Back", "Inverted Wing-Back", "Other"],
+    "CB": ["Central Defender", "Ball-Playing Defender", "No-Nonsense Centre-Back", "Other"],
+    "DM": ["Defensive Midfielder", "Deep Lying Playmaker", "Anchor Man", "Half-Back", "Other"],
+    "CM": ["Central Midfielder", "Box-to-Box Midfielder", "Advanced Playmaker", "Roaming Playmaker", "Mezzala", "Other"],
+    "WM": ["Winger", "Inverted Winger", "Wide Playmaker","Inside Forward","Raumdeuter", "Other"],
+    "AM": ["Attacking Midfielder", "Advanced Playmaker", "Trequartista", "Shadow Striker", "Other"],
+    "ST": ["Deep Lying Forward", "Advanced Forward", "Poacher", "Complete Forward", "Target Man", "False Nine","Pressing Forward", "Other"]
+}
+
+# Maps a specific position name from FORMATION_DATA to a generic role type from POSITION_ROLES
+POSITION_TO_ROLE_TYPE_MAP = {
+    "GK": "GK",
+    "RB": "FB", "LB": "FB", "RWB": "FB", "LWB": "FB",
+    "CB": "CB", "RCB": "CB", "LCB": "CB",
+    "DM": "DM", "CDM": "DM",
+    "CM": "CM", "RCM": "CM", "LCM": "CM",
+    "RM": "WM", "LM": "WM",
+    "RW": "WM", "LW": "WM",
+    "AM": "AM",
+    "ST": "ST", "RS": "ST", "LS": "ST",
+    # Long names written by sessions saved before the formation picker
+    "Goalkeeper": "GK",
+    "Right Back": "FB", "Left Back": "FB", "Right Wing Back": "FB", "Left Wing Back": "FB",
+    "Centre Back": "CB", "Center Back": "CB",
+    "Defensive Midfielder": "DM",
+    "Central Midfielder": "CM",
+    "Right Midfielder": "WM", "Left Midfielder": "WM", "Right Winger": "WM", "Left Winger": "WM",
+    "Attacking Midfielder": "AM",
+    "Striker": "ST", "Centre Forward": "ST", "Center Forward": "ST"
+}
+
+
+def session_content_hash(data):
+    """
+    Identity of a session's content: its date and time plus the canonicalised events
+    (type and positions rounded to 4 decimals; xG/xA are left out because they
+    depend on the model version). Re-saving, importing or syncing the same match
+    yields the same hash whatever the file name or formatting.
+    """
+    def rounded(pos):
+        return [round(pos[0], 4), round(pos[1], 4)] if pos else None
+    info = data.get("session_info") or {}
+    events = [[e.get("type"), rounded(e.get("rel_pos")), rounded(e.get("rel_end_pos"))] for e in data.get("events") or []]
+    canonical = json.dumps([info.get("date", ""), info.get("time", ""), events], separators=(",", ":"))
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+def role_type_for(position):
+    return POSITION_TO_ROLE_TYPE_MAP.get(position, "N/A")
+
+
+SESSION_INFO_FIELDS = ('game_type', 'formation', 'position', 'role', 'date', 'time', 'note', 'time_played', 'performance_rating')
+STAT_FIELDS = ('goals', 'assists', 'shots_on_target', 'shots_off_target', 'total_shots', 'total_xg', 'total_xa')
+
+
+def stats_from_events(events):
+    return {
+        "goals": sum(1 for e in events if e['type'] == 'goal'),
+        "assists": sum(1 for e in events if e['type'] == 'assist'),
+        "shots_on_target": sum(1 for e in events if e['type'] in ['shot_on', 'goal']),
+        "shots_off_target": sum(1 for e in events if e['type'] == 'shot_off'),
+        "total_xg": sum(e.get('xg') or 0 for e in events if e['type'] in SHOT_TYPES),
+        "total_xa": sum(e.get('xa') or 0 for e in events if e['type'] == 'assist'),
+    }
+
+
+def session_stats(data):
+    """Returns the session stats in the current schema, whichever schema the file used."""
+    stats = data.get("stats") or {}
+    if not stats and data.get("events"):
+        stats = stats_from_events(data["events"])
+    shots_on = stats.get("shots_on_target", 0) or 0
+    shots_off = stats.get("shots_off_target", 0) or 0
+    return {
+        "goals": stats.get("goals", 0) or 0,
+        "assists": stats.get("assists", 0) or 0,
+        "shots_on_target": shots_on,
+        "shots_off_target": shots_off,
+        "total_shots": stats.get("total_shots", shots_on + shots_off) or 0,
+        "total_xg": stats.get("total_xg", stats.get("calculated_xg", 0.0)) or 0.0,
+        "total_xa": stats.get("total_xa", stats.get("calculated_xa", 0.0)) or 0.0,
+    }
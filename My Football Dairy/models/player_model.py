@@ -1 +1,250 @@
-# player_model.py
\ No newline at end of file
+# models/player_model.py
+#
+# A player's whole history as column arrays (one entry per session), cached on
+# disk next to the other aggregates so opening the stats view doesn't mean
+# re-reading every session file. Only sessions whose mtime changed are
+# re-read when the cache is refreshed.
+import json
+import math
+import os
+import threading
+
+import numpy as np
+
+from models.match_model import role_type_for, session_stats
+from models.xg_model import CURRENT_MODEL_VERSION, load_scored_session
+from utils.dedup import get_hash_index
+from utils.helpers import MATCH_BASE_DIR, list_session_files, session_mtime
+
+AGGREGATE_CACHE_DIR = os.path.join("data", "cache", "aggregates")
+CACHE_VERSION = 5  # bump when session_row() or the partials change shape
+HISTORY_COLUMNS = ('minutes', 'goals', 'assists', 'shots', 'xg', 'xa')
+PER_90_COLUMNS = ('goals', 'xg', 'xa', 'shots')
+CUMULATIVE_COLUMNS = ('goals', 'assists', 'shots', 'xg', 'xa')
+ROLLING_WINDOW = 10  # sessions
+
+# Partial aggregates are kept per (role_type, role, formation) and merged on query
+GROUP_KEYS = ('role_type', 'role', 'formation')
+AGGREGATE_FIELDS = ('sessions', 'minutes', 'goals', 'assists', 'shots', 'xg', 'xa')
+
+
+def parse_minutes(value):
+    """session_info.time_played as a float, NaN when missing ("" in older files)."""
+    try:
+        minutes = float(value)
+    except (TypeError, ValueError):
+        return math.nan
+    return minutes if minutes > 0 else math.nan
+
+
+def session_row(data):
+    info = data.get("session_info") or {}
+    stats = session_stats(data)
+    return {
+        "date": info.get("date", ""),
+        "role_type": role_type_for(info.get("position")),
+        "role": info.get("role") or "N/A",
+        "formation": info.get("formation") or "N/A",
+        "minutes": parse_minutes(info.get("time_played")),
+        "goals": stats["goals"],
+        "assists": stats["assists"],
+        "shots": stats["shots_on_target"] + stats["shots_off_target"],
+        "xg": stats["total_xg"],
+        "xa": stats["total_xa"],
+    }
+
+
+def empty_aggregate():
+    return dict.fromkeys(AGGREGATE_FIELDS, 0.0)
+
+
+def add_to_aggregate(aggregate, row, sign=1):
+    """Adds (or with sign=-1 removes) one session_row() to an aggregate."""
+    aggregate["sessions"] += sign
+    if not math.isnan(row["minutes"]):
+        aggregate["minutes"] += sign * row["minutes"]
+    for field in ('goals', 'assists', 'shots', 'xg', 'xa'):
+        aggregate[field] += sign * row[field]
+
+
+def merge_aggregates(target, source):
+    for field in AGGREGATE_FIELDS:
+        target[field] += source[field]
+    return target
+
+
+def derived_metrics(aggregate):
+    shots, minutes = aggregate["shots"], aggregate["minutes"]
+    return dict(
+        aggregate,
+        xg_per_shot=aggregate["xg"] / shots if shots else math.nan,
+        conversion=aggregate["goals"] / shots if shots else math.nan,
+        xg_overperformance=aggregate["goals"] - aggregate["xg"],
+        goals_per_90=aggregate["goals"] * 90.0 / minutes if minutes else math.nan,
+        xg_per_90=aggregate["xg"] * 90.0 / minutes if minutes else math.nan,
+    )
+
+
+def group_by(partials, by=('role',), **filters):
+    """
+    Merges partial aggregates into groups. `partials` maps (role_type, role,
+    formation) tuples to aggregates; `by` names the GROUP_KEYS to group on and
+    `filters` pins keys to a value, e.g. group_by(p, by=('role',), role_type='WM').
+    Returns {group tuple: aggregate with derived metrics}.
+    """
+    indexes = [GROUP_KEYS.index(k) for k in by]
+    pinned = [(GROUP_KEYS.index(k), v) for k, v in filters.items()]
+    groups = {}
+    for key, aggregate in partials.items():
+        if all(key[i] == v for i, v in pinned):
+            group = tuple(key[i] for i in indexes)
+            merge_aggregates(groups.setdefault(group, empty_aggregate()), aggregate)
+    return {group: derived_metrics(aggregate) for group, aggregate in groups.items()}
+
+
+def _without_nan(row):
+    # NaN is stored as null to keep the cache valid JSON
+    return {k: (None if isinstance(v, float) and math.isnan(v) else v) for k, v in row.items()}
+
+
+class PlayerHistory:
+    def __init__(self, username):
+        self.username = username
+        self.manifest = {}  # session path relative to the user folder -> mtime
+        self.rows = {}      # session path relative to the user folder -> session_row()
+        self.names = []
+        self.dates = []
+        self.columns = {c: np.zeros(0) for c in HISTORY_COLUMNS}
+        self.cumulative = {c: np.zeros(0) for c in CUMULATIVE_COLUMNS}
+        self.partials = {}  # (role_type, role, formation) -> aggregate
+
+    @property
+    def cache_path(self):
+        return os.path.join(AGGREGATE_CACHE_DIR, f"{self.username}.json")
+
+    def refresh(self, base_dir=MATCH_BASE_DIR, should_stop=None):
+        """
+        Brings the history up to date with the files on disk. Returns True if
+        anything changed. If should_stop() turns true it stops between session
+        reads; sessions not read yet are left out of the manifest for next time.
+        """
+        folder = os.path.join(base_dir, self.username)
+        # Relative paths, so sessions inside sealed archives ("<archive>/<name>") resolve too
+        current = {os.path.relpath(p, folder): session_mtime(p) for p in list_session_files(self.username, base_dir)}
+        if current == self.manifest:
+            return False
+        # Exact copies of an earlier session (same content hash) are left out of the aggregates
+        hash_index = get_hash_index(self.username, should_stop)
+        if not hash_index.refresh(should_stop):
+            return False  # duplicates aren't all known yet
+        duplicates = {name for name in current if hash_index.is_duplicate(name)}
+        for name in list(self.rows):
+            if name not in current or name in duplicates:
+                self.set_row(name, None)
+        pending = set()
+        for name, mtime in current.items():
+            if name in duplicates:
+                continue
+            if self.manifest.get(name) != mtime or name not in self.rows:
+                if pending or (should_stop is not None and should_stop()):
+                    pending.add(name)
+                    continue
+                data = load_scored_session(os.path.join(folder, name))
+                self.set_row(name, session_row(data) if data is not None else None)
+        manifest = {name: current[name] for name in current
+                    if (name in self.rows or name in duplicates) and name not in pending}
+        # A pending session keeps its old mtime (if any) so the next refresh re-reads it
+        manifest.update((name, self.manifest[name]) for name in pending if name in self.manifest)
+        self.manifest = manifest
+        self._build_columns()
+        return True
+
+    def set_row(self, name, row):
+        """Replaces (or with row=None drops) one session, updating the partials by delta."""
+        old_row = self.rows.pop(name, None)
+        if old_row is not None:
+            key = tuple(old_row[k] for k in GROUP_KEYS)
+            add_to_aggregate(self.partials[key], old_row, sign=-1)
+            if self.partials[key]["sessions"] <= 0:
+                del self.partials[key]
+        if row is not None:
+            self.rows[name] = row
+            add_to_aggregate(self.partials.setdefault(tuple(row[k] for k in GROUP_KEYS), empty_aggregate()), row)
+
+    def _build_columns(self):
+        # Chronological order so cumulative series and trends read left to right
+        self.names = sorted(self.rows, key=lambda n: (self.rows[n]["date"], n))
+        self.dates = [self.rows[n]["date"] for n in self.names]
+        self.columns = {c: np.array([self.rows[n][c] for n in self.names], dtype=float) for c in HISTORY_COLUMNS}
+        # Running totals feed the history charts and make any rolling window O(1) per point
+        self.cumulative = {c: np.cumsum(self.columns[c]) for c in CUMULATIVE_COLUMNS}
+
+    def totals(self):
+        totals = {c: float(self.columns[c].sum()) for c in HISTORY_COLUMNS if c != 'minutes'}
+        totals["sessions"] = len(self.names)
+        return totals
+
+    def per_90(self):
+        """Per-90 rates over the sessions that recorded minutes played."""
+        minutes = self.columns['minutes']
+        mask = ~np.isnan(minutes)
+        total_minutes = float(minutes[mask].sum())
+        result = {"minutes": total_minutes, "sessions_with_minutes": int(mask.sum())}
+        for c in PER_90_COLUMNS:
+            result[c] = float(self.columns[c][mask].sum() * 90.0 / total_minutes) if total_minutes else math.nan
+        return result
+
+    def rolling_mean(self, column, window=ROLLING_WINDOW):
+        """Per-session average of `column` over the last `window` sessions (fewer at the start)."""
+        cumulative = np.concatenate(([0.0], self.cumulative[column]))
+        end = np.arange(1, len(cumulative))
+        start = np.maximum(end - window, 0)
+        return (cumulative[end] - cumulative[start]) / (end - start)
+
+    def per_90_series(self, column):
+        """Per-session per-90 rate of `column`; NaN where minutes weren't recorded."""
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return self.columns[column] * 90.0 / self.columns['minutes']
+
+    def save_cache(self):
+        os.makedirs(AGGREGATE_CACHE_DIR, exist_ok=True)
+        tmp_path = self.cache_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            rows = {n: _without_nan(r) for n, r in self.rows.items()}
+            partials = {"|".join(key): aggregate for key, aggregate in self.partials.items()}
+            json.dump({"version": CACHE_VERSION, "xg_model_version": CURRENT_MODEL_VERSION, "manifest": self.manifest, "rows": rows, "partials": partials,
+                       "totals": self.totals(), "per_90": _without_nan(self.per_90())}, f, allow_nan=False)
+        os.replace(tmp_path, self.cache_path)
+
+    def load_cache(self):
+        try:
+            with open(self.cache_path, "r") as f:
+                cached = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return False
+        # Rows hold xG scored by the model at the time: a new model means re-reading every session
+        if cached.get("version") != CACHE_VERSION or cached.get("xg_model_version") != CURRENT_MODEL_VERSION:
+            return False
+        self.manifest = cached["manifest"]
+        self.rows = {n: dict(r, minutes=math.nan if r["minutes"] is None else r["minutes"])
+                     for n, r in cached["rows"].items()}
+        self.partials = {tuple(key.split("|")): aggregate for key, aggregate in cached["partials"].items()}
+        self._build_columns()
+        return True
+
+
+_histories = {}
+_histories_lock = threading.Lock()  # the post-login prefetcher refreshes from a worker thread
+
+
+def get_player_history(username, should_stop=None):
+    """Returns the up-to-date, memory-cached PlayerHistory for a user (partly refreshed if should_stop() fired)."""
+    with _histories_lock:
+        history = _histories.get(username)
+        if history is None:
+            history = PlayerHistory(username)
+            history.load_cache()
+            _histories[username] = history
+        if history.refresh(should_stop=should_stop):
+            history.save_cache()
+        return history
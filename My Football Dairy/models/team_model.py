@@ -1 +1,210 @@
-# team_model.py
\ No newline at end of file
+# models/team_model.py
+#
+# Squad-wide views built by merging each player's cached partial aggregates
+# (see models/player_model.py), never by rescanning session files.
+import bisect
+import heapq
+import json
+import os
+
+from models.match_model import session_stats
+from models.player_model import empty_aggregate, get_player_history, group_by, merge_aggregates
+from models.xg_model import CURRENT_MODEL_VERSION, load_scored_session
+from utils.dedup import get_hash_index
+from utils.helpers import MATCH_BASE_DIR, list_session_files, list_usernames
+
+
+def squad_partials(usernames=None):
+    """Merged (role_type, role, formation) partials across the squad."""
+    merged = {}
+    for username in usernames if usernames is not None else list_usernames():
+        for key, aggregate in get_player_history(username).partials.items():
+            merge_aggregates(merged.setdefault(key, empty_aggregate()), aggregate)
+    return merged
+
+
+def squad_group_by(by=('role',), usernames=None, **filters):
+    """e.g. squad_group_by(by=('formation',)) or squad_group_by(by=('role',), role_type='WM')."""
+    return group_by(squad_partials(usernames), by, **filters)
+
+
+# --- Club leaderboards ---
+#
+# Maintained incrementally: every writer of a session file (save, edit, sync
+# pull, rescore --rewrite) calls record_saved_session(), which moves the
+# player's entry in each affected sorted board instead of recomputing
+# anything. Finding the spot is an O(log n) bisect; the list insert/delete
+# itself shifts up to n entries, a memmove over a club's few hundred players.
+# The per-session entries are persisted as an append-only log replayed at
+# startup. Its first line records the xG model the entries were scored with;
+# a log from another model is rebuilt.
+
+LEADERBOARD_LOG_PATH = os.path.join("data", "cache", "leaderboards.jsonl")
+LEADERBOARD_METRICS = ('goals', 'xg', 'xa', 'xg_overperformance', 'conversion')
+ALL_GAME_TYPES = "All"
+MIN_SHOTS_FOR_CONVERSION = 5
+
+
+def _metric_value(metric, totals):
+    goals, xg, xa, shots = totals
+    if metric == 'goals': return goals
+    if metric == 'xg': return xg
+    if metric == 'xa': return xa
+    if metric == 'xg_overperformance': return goals - xg
+    if metric == 'conversion': return goals / shots if shots >= MIN_SHOTS_FOR_CONVERSION else None
+
+
+def leaderboard_entry(data):
+    """(date, game_type, goals, xg, xa, shots) for one session."""
+    info = data.get("session_info") or {}
+    stats = session_stats(data)
+    return (info.get("date", ""), info.get("game_type", ""), stats["goals"], stats["total_xg"],
+            stats["total_xa"], stats["shots_on_target"] + stats["shots_off_target"])
+
+
+class Leaderboards:
+    def __init__(self, log_path=LEADERBOARD_LOG_PATH):
+        self.log_path = log_path
+        self.sessions = {}  # (username, session name) -> leaderboard_entry()
+        self.totals = {}    # (game_type, username) -> [goals, xg, xa, shots]
+        self.boards = {}    # (metric, game_type) -> sorted [(-value, username)]
+        self.by_date = {}   # (game_type, username) -> sorted [(date, session name)]
+
+    def load(self):
+        """Replays the log; builds it from matches_history if there is none yet or the xG model changed."""
+        if self._log_model_version() != CURRENT_MODEL_VERSION:
+            self._bootstrap()
+            return self
+        replayed = 0
+        with open(self.log_path, "r") as f:
+            f.readline()  # the header
+            for line in f:
+                try:
+                    username, name, entry = json.loads(line)
+                except (json.JSONDecodeError, ValueError):
+                    continue
+                self._update(username, name, tuple(entry) if entry else None)
+                replayed += 1
+        if replayed > 2 * len(self.sessions) + 100:
+            self._write_log()
+        return self
+
+    def _log_model_version(self):
+        try:
+            with open(self.log_path, "r") as f:
+                header = json.loads(f.readline())
+        except (OSError, json.JSONDecodeError):
+            return None
+        return header.get("xg_model_version") if isinstance(header, dict) else None
+
+    def _bootstrap(self):
+        for username in list_usernames():
+            hash_index = get_hash_index(username)
+            folder = os.path.join(MATCH_BASE_DIR, username)
+            for path in list_session_files(username):
+                if hash_index.is_duplicate(os.path.relpath(path, folder)):
+                    continue
+                data = load_scored_session(path)
+                if data is not None:
+                    self._update(username, os.path.basename(path), leaderboard_entry(data))
+        self._write_log()
+
+    def _write_log(self):
+        os.makedirs(os.path.dirname(self.log_path), exist_ok=True)
+        tmp_path = self.log_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            f.write(json.dumps({"xg_model_version": CURRENT_MODEL_VERSION}) + "\n")
+            for (username, name), entry in self.sessions.items():
+                f.write(json.dumps([username, name, entry]) + "\n")
+        os.replace(tmp_path, self.log_path)
+
+    def record_session(self, username, name, data):
+        """Adds/replaces one saved session (data=None removes it) and logs the change."""
+        entry = leaderboard_entry(data) if data is not None else None
+        self._update(username, name, entry)
+        os.makedirs(os.path.dirname(self.log_path), exist_ok=True)
+        with open(self.log_path, "a") as f:
+            f.write(json.dumps([username, name, entry]) + "\n")
+
+    def _update(self, username, name, entry):
+        old = self.sessions.pop((username, name), None)
+        if old is not None:
+            self._apply(username, name, old, -1)
+        if entry is not None:
+            self.sessions[(username, name)] = entry
+            self._apply(username, name, entry, 1)
+
+    def _apply(self, username, name, entry, sign):
+        date, game_type, goals, xg, xa, shots = entry
+        for gt in {game_type, ALL_GAME_TYPES}:
+            totals = self.totals.setdefault((gt, username), [0, 0.0, 0.0, 0])
+            for metric in LEADERBOARD_METRICS:
+                self._remove_from_board(metric, gt, username, _metric_value(metric, totals))
+            for i, value in enumerate((goals, xg, xa, shots)):
+                totals[i] += sign * value
+            dated = self.by_date.setdefault((gt, username), [])
+            if sign > 0:
+                bisect.insort(dated, (date, name))
+            else:
+                index = bisect.bisect_left(dated, (date, name))
+                if index < len(dated) and dated[index] == (date, name):
+                    del dated[index]
+            if not dated:
+                del self.totals[(gt, username)], self.by_date[(gt, username)]
+                continue
+            for metric in LEADERBOARD_METRICS:
+                value = _metric_value(metric, totals)
+                if value is not None:
+                    bisect.insort(self.boards.setdefault((metric, gt), []), (-value, username))
+
+    def _remove_from_board(self, metric, game_type, username, value):
+        board = self.boards.get((metric, game_type))
+        if board is None or value is None:
+            return
+        index = bisect.bisect_left(board, (-value, username))
+        if index < len(board) and board[index] == (-value, username):
+            del board[index]
+
+    def top(self, metric, k=10, game_type=ALL_GAME_TYPES, start_date=None, end_date=None):
+        """[(username, value)] best first. Dates are inclusive ISO strings."""
+        if start_date is None and end_date is None:
+            return [(username, -value) for value, username in self.boards.get((metric, game_type), [])[:k]]
+
+        low, high = (start_date or "", ""), (end_date or "\uffff", "\uffff")
+        candidates = []
+        for (gt, username), dated in self.by_date.items():
+            if gt != game_type:
+                continue
+            in_window = dated[bisect.bisect_left(dated, low):bisect.bisect_right(dated, high)]
+            if not in_window:
+                continue
+            totals = [0, 0.0, 0.0, 0]
+            for _, name in in_window:
+                entry = self.sessions[(username, name)]
+                for i in range(4):
+                    totals[i] += entry[2 + i]
+            value = _metric_value(metric, totals)
+            if value is not None:
+                candidates.append((-value, username))
+        return [(username, -value) for value, username in heapq.nsmallest(k, candidates)]
+
+
+_leaderboards = None
+
+
+def get_leaderboards():
+    global _leaderboards
+    if _leaderboards is None:
+        _leaderboards = Leaderboards().load()
+    return _leaderboards
+
+
+def record_saved_session(username, path):
+    """
+    Brings the boards up to date after a session under matches_history was
+    written or edited. The hash index must already hold the new content, so
+    an exact duplicate of another session is taken off the boards.
+    """
+    name = os.path.relpath(path, os.path.join(MATCH_BASE_DIR, username))
+    data = None if get_hash_index(username).is_duplicate(name) else load_scored_session(path)
+    get_leaderboards().record_session(username, os.path.basename(path), data)
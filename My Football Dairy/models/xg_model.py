@@ -0,0 +1,242 @@
+# models/xg_model.py
+#
+# Pluggable xG/xA models. Every saved session is stamped with the version of
+# the model that scored it (session_info.xg_model_version; files saved before
+# stamping count as LEGACY_MODEL_VERSION). Sessions scored by another version
+# are re-scored lazily by load_scored_session() and the result cached per
+# (session, model version), or eagerly for the whole archive with
+#
+#   python -m models.xg_model --version v1 --workers 4
+import argparse
+import json
+import math
+import os
+import threading
+from collections import OrderedDict
+from multiprocessing import Pool
+
+from models.match_model import stats_from_events
+from utils.archive import split_member_path
+from utils.helpers import MATCH_BASE_DIR, is_archived, list_session_files, list_usernames, load_session, session_mtime
+from utils.session_patches import save_session
+
+LEGACY_MODEL_VERSION = "v1"
+CURRENT_MODEL_VERSION = "v1"
+LOGISTIC_MODEL_PATH = os.path.join("data", "models", "xg_logistic.json")
+SCORE_CACHE_DIR = os.path.join("data", "cache", "xg_scores")
+MEMORY_CACHE_SIZE = 512  # sessions
+
+XG_MODELS = {}
+
+
+def register_xg_model(model):
+    XG_MODELS[model.version] = model
+    return model
+
+
+def get_xg_model(version=None):
+    return XG_MODELS[version or CURRENT_MODEL_VERSION]
+
+
+class HandTunedXgModel:
+    """Distance/angle curve used since the first release."""
+    version = "v1"
+
+    def xg(self, rel_pos):
+        rel_x, rel_y = rel_pos
+        if rel_y <= 0.01: return 0.99
+        shot_x_m = (rel_x - 0.5) * 68.0
+        shot_y_m = rel_y * 52.5
+        distance_m = math.sqrt(shot_x_m**2 + shot_y_m**2)
+        dist_to_post1_sq = (shot_x_m - (-7.32 / 2))**2 + shot_y_m**2
+        dist_to_post2_sq = (shot_x_m - (7.32 / 2))**2 + shot_y_m**2
+        if dist_to_post1_sq == 0 or dist_to_post2_sq == 0: return 0.95
+        cos_angle = max(-1.0, min(1.0, (dist_to_post1_sq + dist_to_post2_sq - 7.32**2) / (2 * math.sqrt(dist_to_post1_sq * dist_to_post2_sq))))
+        angle_rad = math.acos(cos_angle)
+        final_xg = (0.8 * math.exp(-distance_m / 8)) * ((angle_rad / 0.7) ** 0.7)
+        return min(final_xg, 0.99)
+
+    def xa(self, rel_pos):
+        rel_x, rel_y = rel_pos; x_m = (rel_x - 0.5) * 68.0; y_m = rel_y * 52.5
+        if y_m < 10 and abs(x_m) > (7.32 / 2): return 0.15 + (10 - y_m) * 0.02
+        if 16.5 < y_m < 30 and abs(x_m) < 12: return 0.08 + (30 - y_m) * 0.007
+        return min(0.12 * math.exp(-math.sqrt(x_m**2 + y_m**2) / 20), 0.15)
+
+
+register_xg_model(HandTunedXgModel())
+
+
+def shot_features(rel_pos):
+    """Scaled (distance, angle, lateral offset, depth) of a shot, as used by LogisticXgModel."""
+    rel_x, rel_y = rel_pos
+    x_m, y_m = (rel_x - 0.5) * 68.0, rel_y * 52.5
+    distance_m = math.sqrt(x_m**2 + y_m**2)
+    # Angle subtended by the goal mouth
+    angle_rad = abs(math.atan2(x_m + 7.32 / 2, y_m) - math.atan2(x_m - 7.32 / 2, y_m))
+    return (distance_m / 30.0, angle_rad, abs(x_m) / 34.0, y_m / 52.5)
+
+
+class LogisticXgModel(HandTunedXgModel):
+    """
+    Logistic regression on shot_features(), fitted by models/xg_trainer.py.
+    Scoring is plain math on the exported coefficients; xA still uses the v1 curve.
+    """
+    def __init__(self, coefficients):
+        self.weights = coefficients["weights"]
+        self.bias = coefficients["bias"]
+        self.version = coefficients["version"]
+        self.active = coefficients.get("active", False)
+
+    def xg(self, rel_pos):
+        z = self.bias + sum(w * f for w, f in zip(self.weights, shot_features(rel_pos)))
+        z = max(-30.0, min(30.0, z))
+        return min(1.0 / (1.0 + math.exp(-z)), 0.99)
+
+
+def load_logistic_model(path=LOGISTIC_MODEL_PATH):
+    """Registers the exported logistic model, if any. Returns it (or None)."""
+    try:
+        with open(path, "r") as f:
+            coefficients = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return None
+    return register_xg_model(LogisticXgModel(coefficients))
+
+
+_logistic_model = load_logistic_model()
+if _logistic_model is not None and _logistic_model.active:
+    CURRENT_MODEL_VERSION = _logistic_model.version
+
+
+def session_model_version(data):
+    return (data.get("session_info") or {}).get("xg_model_version", LEGACY_MODEL_VERSION)
+
+
+def score_events(events, version=None):
+    """Returns [xg, xa] per event under the given model."""
+    model = get_xg_model(version)
+    return [[model.xg(e['rel_pos']), model.xa(e['rel_pos'])] if e.get('rel_pos') else [e.get('xg'), e.get('xa')]
+            for e in events]
+
+
+def apply_scores(data, scores, version):
+    """Returns a copy of the session with event scores, stats and version replaced."""
+    events = [dict(e, xg=xg, xa=xa) for e, (xg, xa) in zip(data.get("events") or [], scores)]
+    session_info = dict(data.get("session_info") or {}, xg_model_version=version)
+    stats = dict(data.get("stats") or {})
+    recomputed = stats_from_events(events)
+    stats["total_xg"], stats["total_xa"] = recomputed["total_xg"], recomputed["total_xa"]
+    stats.pop("calculated_xg", None); stats.pop("calculated_xa", None)
+    return dict(data, session_info=session_info, stats=stats, events=events)
+
+
+class ScoreCache:
+    """Per-(session, model version) scores, in memory (LRU) and on disk."""
+    def __init__(self, cache_dir=SCORE_CACHE_DIR, max_entries=MEMORY_CACHE_SIZE):
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()  # shared by the UI thread and the post-login prefetcher
+
+    def _disk_path(self, path, version):
+        member = split_member_path(path)
+        if member:
+            archive_path, name = member
+            name = f"{os.path.basename(archive_path)}-{name}"
+            path = os.path.join(os.path.dirname(archive_path), name)
+        username, name = os.path.basename(os.path.dirname(path)), os.path.basename(path)
+        return os.path.join(self.cache_dir, version, username, name)
+
+    def get(self, path, version, mtime):
+        key = (path, version)
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                self._memory.move_to_end(key)
+        if entry is None:
+            try:
+                with open(self._disk_path(path, version), "r") as f:
+                    entry = json.load(f)
+            except (OSError, json.JSONDecodeError):
+                return None
+            self._remember(key, entry)
+        return entry["scores"] if entry["mtime"] == mtime else None
+
+    def put(self, path, version, mtime, scores):
+        entry = {"mtime": mtime, "scores": scores}
+        self._remember((path, version), entry)
+        disk_path = self._disk_path(path, version)
+        os.makedirs(os.path.dirname(disk_path), exist_ok=True)
+        with open(disk_path, "w") as f:
+            json.dump(entry, f)
+
+    def _remember(self, key, entry):
+        with self._lock:
+            self._memory[key] = entry
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+
+
+score_cache = ScoreCache()
+
+
+def load_scored_session(path, version=None, cache=score_cache):
+    """Loads a session with xG/xA under `version` (default: current model), re-scoring lazily."""
+    data = load_session(path)
+    if data is None:
+        return None
+    version = version or CURRENT_MODEL_VERSION
+    if session_model_version(data) == version:
+        return data
+    mtime = session_mtime(path)
+    scores = cache.get(path, version, mtime)
+    if scores is None:
+        scores = score_events(data.get("events") or [], version)
+        cache.put(path, version, mtime, scores)
+    return apply_scores(data, scores, version)
+
+
+def _rescore_file(job):
+    """(path, rewritten) for a session that was re-scored, None if it was up to date."""
+    path, version, rewrite, cache_dir = job
+    data = load_session(path)
+    if data is None or session_model_version(data) == version:
+        return None
+    scores = score_events(data.get("events") or [], version)
+    if rewrite and not is_archived(path):
+        save_session(path, apply_scores(data, scores, version))
+        return path, True
+    # Sealed archives are never rewritten; their scores live in the cache
+    ScoreCache(cache_dir).put(path, version, session_mtime(path), scores)
+    return path, False
+
+
+def rescore_archive(version=None, workers=None, rewrite=False, base_dir=MATCH_BASE_DIR, cache_dir=SCORE_CACHE_DIR):
+    """Eagerly re-scores every out-of-date session across processes. Returns the count."""
+    version = version or CURRENT_MODEL_VERSION
+    jobs = ((path, version, rewrite, cache_dir)
+            for username in list_usernames(base_dir)
+            for path in list_session_files(username, base_dir))
+    with Pool(workers) as pool:
+        results = [r for r in pool.imap_unordered(_rescore_file, jobs, chunksize=16) if r is not None]
+    rewritten = [path for path, was_rewritten in results if was_rewritten]
+    if rewritten and base_dir == MATCH_BASE_DIR:
+        from models.team_model import record_saved_session  # team_model imports this module
+        for path in rewritten:
+            record_saved_session(os.path.relpath(path, base_dir).split(os.sep)[0], path)
+    return len(results)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-score stored sessions with an xG model version")
+    parser.add_argument("--version", default=CURRENT_MODEL_VERSION, choices=sorted(XG_MODELS))
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--rewrite", action="store_true", help="stamp the files themselves instead of filling the cache")
+    args = parser.parse_args()
+    count = rescore_archive(args.version, args.workers, args.rewrite)
+    print(f"Re-scored {count} sessions with model {args.version}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+# models/xg_trainer.py
+#
+# Fits LogisticXgModel by minibatch gradient descent over every stored shot
+# (label: goal = 1, shot_on/shot_off = 0), streaming events from all users'
+# sessions so the archive is never held in memory.
+#
+#   python -m models.xg_trainer            # update with sessions since last run
+#   python -m models.xg_trainer --full     # retrain from scratch
+#   python -m models.xg_trainer --activate # make it the model used on the pitch
+#
+# Coefficients are exported to data/models/xg_logistic.json; scoring a tap
+# then only needs a dot product (see models/xg_model.py).
+import argparse
+import hashlib
+import json
+import os
+import time
+
+import numpy as np
+
+from models.xg_model import LOGISTIC_MODEL_PATH, shot_features
+from utils.helpers import MATCH_BASE_DIR, list_session_files, list_usernames, load_session, session_mtime
+
+N_FEATURES = 4
+BATCH_SIZE = 4096
+LEARNING_RATE = 0.5
+L2 = 1e-4
+
+
+def iter_shot_batches(since=0.0, batch_size=BATCH_SIZE, base_dir=MATCH_BASE_DIR):
+    """Yields (features, labels) arrays from sessions modified after `since`."""
+    features = np.empty((batch_size, N_FEATURES))
+    labels = np.empty(batch_size)
+    n = 0
+    for username in list_usernames(base_dir):
+        for path in list_session_files(username, base_dir):
+            if session_mtime(path) <= since:
+                continue
+            data = load_session(path)
+            for event in (data or {}).get("events") or []:
+                if event.get("type") not in ("goal", "shot_on", "shot_off") or not event.get("rel_pos"):
+                    continue
+                features[n] = shot_features(event["rel_pos"])
+                labels[n] = 1.0 if event["type"] == "goal" else 0.0
+                n += 1
+                if n == batch_size:
+                    yield features, labels
+                    features, labels, n = np.empty((batch_size, N_FEATURES)), np.empty(batch_size), 0
+    if n:
+        yield features[:n], labels[:n]
+
+
+class LogisticXgTrainer:
+    def __init__(self, coefficients=None):
+        coefficients = coefficients or {}
+        self.weights = np.asarray(coefficients.get("weights", [0.0] * N_FEATURES), dtype=float)
+        self.bias = coefficients.get("bias", 0.0)
+        self.shots_seen = coefficients.get("shots_seen", 0)
+        self.trained_until = coefficients.get("trained_until", 0.0)
+        self.active = coefficients.get("active", False)
+
+    def partial_fit(self, features, labels, learning_rate=LEARNING_RATE):
+        z = np.clip(features @ self.weights + self.bias, -30, 30)
+        error = 1.0 / (1.0 + np.exp(-z)) - labels
+        n = len(labels)
+        self.weights -= learning_rate * (features.T @ error / n + L2 * self.weights)
+        self.bias -= learning_rate * error.mean()
+
+    def fit_stream(self, batches, epochs=1):
+        """Trains on streamed batches. With epochs > 1 the batches are kept in memory and replayed."""
+        cached = []
+        for features, labels in batches:
+            self.partial_fit(features, labels)
+            self.shots_seen += len(labels)
+            if epochs > 1:
+                cached.append((features, labels))
+        for _ in range(epochs - 1):
+            for features, labels in cached:
+                self.partial_fit(features, labels)
+
+    def coefficients(self):
+        weights = [float(w) for w in self.weights]
+        digest = hashlib.sha1(json.dumps([weights, float(self.bias)]).encode()).hexdigest()[:8]
+        return {
+            "version": f"logistic-{digest}",
+            "features": ["distance/30m", "goal angle (rad)", "|lateral|/34m", "depth/52.5m"],
+            "weights": weights,
+            "bias": float(self.bias),
+            "shots_seen": self.shots_seen,
+            "trained_until": self.trained_until,
+            "active": self.active,
+        }
+
+    def export(self, path=LOGISTIC_MODEL_PATH):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.coefficients(), f, indent=4)
+        os.replace(tmp_path, path)
+
+
+def load_trainer(path=LOGISTIC_MODEL_PATH):
+    try:
+        with open(path, "r") as f:
+            return LogisticXgTrainer(json.load(f))
+    except (OSError, json.JSONDecodeError):
+        return LogisticXgTrainer()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train the logistic xG model on stored shots")
+    parser.add_argument("--full", action="store_true", help="ignore existing coefficients and retrain")
+    parser.add_argument("--epochs", type=int, default=1)
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument("--activate", action="store_true", help="use this model for new sessions")
+    args = parser.parse_args()
+
+    trainer = LogisticXgTrainer() if args.full else load_trainer()
+    started, start_wall = time.perf_counter(), time.time()
+    seen_before = trainer.shots_seen
+    trainer.fit_stream(iter_shot_batches(trainer.trained_until, args.batch_size), args.epochs)
+    trainer.trained_until = start_wall
+    trainer.active = trainer.active or args.activate
+    trainer.export()
+    coefficients = trainer.coefficients()
+    print(f"Trained on {trainer.shots_seen - seen_before} shots in {time.perf_counter() - started:.1f}s "
+          f"-> {coefficients['version']}{' (active)' if trainer.active else ''}")
+
+
+if __name__ == "__main__":
+    main()
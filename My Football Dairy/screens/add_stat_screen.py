@@ -1,7 +1,7 @@
-import json
 import math
-from datetime import date, datetime
+from datetime import date, datetime, time
 import os
+import uuid
 
 # KivyMD imports
 from kivymd.app import MDApp
@@ -23,61 +23,25 @@ from kivy.uix.label import Label as KivyLabel
 from kivy.graphics import Color, Ellipse, Line, Rectangle, InstructionGroup, Triangle
 from kivy.metrics import dp
 from kivy.uix.scrollview import ScrollView
-
-# --- Data for Formations and Roles (Inspired by FM24) ---
-
-# Coordinates are (rel_x, rel_y) from 0.0 to 1.0, where (0,0) is bottom-left
-FORMATION_DATA = {
-    "4-4-2": {
-        "GK": (0.5, 0.08),
-        "RB": (0.85, 0.22), "RCB": (0.65, 0.2), "LCB": (0.35, 0.2), "LB": (0.15, 0.22),
-        "RM": (0.8, 0.5), "RCM": (0.6, 0.5), "LCM": (0.4, 0.5), "LM": (0.2, 0.5),
-        "RS": (0.6, 0.8), "LS": (0.4, 0.8)
-    },
-    "4-3-3": {
-        "GK": (0.5, 0.08),
-        "RB": (0.85, 0.25), "RCB": (0.65, 0.2), "LCB": (0.35, 0.2), "LB": (0.15, 0.25),
-        "DM": (0.5, 0.35), "RCM": (0.7, 0.55), "LCM": (0.3, 0.55),
-        "RW": (0.8, 0.78), "ST": (0.5, 0.82), "LW": (0.2, 0.78)
-    },
-    "3-5-2": {
-        "GK": (0.5, 0.08),
-        "RCB": (0.7, 0.2), "CB": (0.5, 0.2), "LCB": (0.3, 0.2),
-        "RWB": (0.85, 0.45), "RCM": (0.65, 0.5), "CDM": (0.5, 0.38), "LCM": (0.35, 0.5), "LWB": (0.15, 0.45),
-        "RS": (0.6, 0.8), "LS": (0.4, 0.8)
-    },
-    "5-3-2": {
-        "GK": (0.5, 0.08),
-        "RWB": (0.9, 0.35), "RCB": (0.7, 0.2), "CB": (0.5, 0.2), "LCB": (0.3, 0.2), "LWB": (0.1, 0.35),
-        "RCM": (0.65, 0.55), "CM": (0.5, 0.5), "LCM": (0.35, 0.55),
-        "RS": (0.6, 0.8), "LS": (0.4, 0.8)
-    }
-}
-
-# Maps a generic position type to a list of available roles
-POSITION_ROLES = {
-    "GK": ["Goalkeeper", "Sweeper Keeper", "Other"],
-    "FB": ["Full-Back", "Wing-Back", "Inverted Wing-Back", "Other"],
-    "CB": ["Central Defender", "Ball-Playing Defender", "No-Nonsense Centre-Back", "Other"],
-    "DM": ["Defensive Midfielder", "Deep Lying Playmaker", "Anchor Man", "Half-Back", "Other"],
-    "CM": ["Central Midfielder", "Box-to-Box Midfielder", "Advanced Playmaker", "Roaming Playmaker", "Mezzala", "Other"],
-    "WM": ["Winger", "Inverted Winger", "Wide Playmaker","Inside Forward","Raumdeuter", "Other"],
-    "AM": ["Attacking Midfielder", "Advanced Playmaker", "Trequartista", "Shadow Striker", "Other"],
-    "ST": ["Deep Lying Forward", "Advanced Forward", "Poacher", "Complete Forward", "Target Man", "False Nine","Pressing Forward", "Other"]
-}
-
-# Maps a specific position name from FORMATION_DATA to a generic role type from POSITION_ROLES
-POSITION_TO_ROLE_TYPE_MAP = {
-    "GK": "GK",
-    "RB": "FB", "LB": "FB", "RWB": "FB", "LWB": "FB",
-    "CB": "CB", "RCB": "CB", "LCB": "CB",
-    "DM": "DM", "CDM": "DM",
-    "CM": "CM", "RCM": "CM", "LCM": "CM",
-    "RM": "WM", "LM": "WM",
-    "RW": "WM", "LW": "WM",
-    "AM": "AM",
-    "ST": "ST", "RS": "ST", "LS": "ST"
-}
+from kivy.clock import Clock
+
+from models.match_model import FORMATION_DATA, POSITION_ROLES, POSITION_TO_ROLE_TYPE_MAP, session_content_hash, stats_from_events
+from models.team_model import record_saved_session
+from models.xg_model import CURRENT_MODEL_VERSION, get_xg_model
+from utils.dedup import get_hash_index
+from utils.draft_journal import DraftJournal
+from utils.event_bus import CLEARED, END_SET, MARKER_ADDED, MARKER_CHANGED, MARKER_TOPICS, MARKER_UNDONE, POSITION_SELECTED, EventBus
+from utils.helpers import MATCH_BASE_DIR, load_session
+from utils.pitch_geometry import (DIRECTION_COLOR, DIRECTION_WIDTH, LINE_COLOR, LINE_WIDTH, MARKER_STYLES, SHOT_OFF_STROKE,
+                                  arrow_head, fit_half_pitch, grass_stripes, half_pitch_markings, star_points)
+from utils.prefetch import session_cache
+from utils.search_index import get_search_index
+from utils.session_patches import append_patches, diff_session, normalise_event, save_session
+from utils.validators import MAX_MINUTES_PLAYED, validate_session
+
+JOURNAL_FLUSH_INTERVAL = 2.0  # seconds between draft journal fsyncs
+MARKER_GRAB_RADIUS = 14  # dp; when editing, touches this close to a marker pick it up
+DRAFT_OPS = {MARKER_ADDED: 'add', END_SET: 'end', MARKER_UNDONE: 'undo', CLEARED: 'clear'}  # event -> journal op
 
 class FullPitchPositionWidget(Widget):
     def __init__(self, **kwargs):
@@ -185,7 +149,7 @@ class FullPitchPositionWidget(Widget):
                 self.selected_position_name = closest_pos_name
                 self.redraw_position_nodes()
                 if self.parent_screen:
-                    self.parent_screen.set_position_from_pitch(self.selected_position_name)
+                    self.parent_screen.events.publish(POSITION_SELECTED, {'position': self.selected_position_name})
                 return True
         return super().on_touch_down(touch)
 
@@ -232,6 +196,8 @@ class HalfPitchWidget(Widget):
         self.current_marker_type = 'shot_on'
         self.parent_screen = None
         self.drawing_direction_marker = None
+        self.selected_marker = None  # editing a saved session: marker to move or retype
+        self.dragging_marker = None
         self.direction_preview_line = InstructionGroup()
         self.pitch_x, self.pitch_y, self.pitch_w, self.pitch_h = 0, 0, 0, 0
         with self.canvas.before:
@@ -247,53 +213,15 @@ class HalfPitchWidget(Widget):
 
     def _update_pitch_graphics(self, *args):
         self.pitch_graphics.clear()
-        pitch_aspect_ratio = 68 / 52.5
-        if self.width / self.height > pitch_aspect_ratio:
-            self.pitch_h = self.height; self.pitch_w = self.height * pitch_aspect_ratio
-        else:
-            self.pitch_w = self.width; self.pitch_h = self.width / pitch_aspect_ratio
-        self.pitch_x = self.x + (self.width - self.pitch_w) / 2; self.pitch_y = self.y + (self.height - self.pitch_h) / 2
+        self.pitch_x, self.pitch_y, self.pitch_w, self.pitch_h = fit_half_pitch(self.x, self.y, self.width, self.height)
         w, h, x, y = self.pitch_w, self.pitch_h, self.pitch_x, self.pitch_y
         self._draw_grass_pattern(x, y, w, h)
-        self.pitch_graphics.add(Color(0.9, 0.9, 0.9, 0.9)); line_width = dp(1.5)
-        def add_line(*points): self.pitch_graphics.add(Line(points=points, width=line_width))
-        center_x = x + w / 2
-        add_line(x, y, x + w, y); add_line(x, y, x, y + h); add_line(x + w, y, x + w, y + h); add_line(x, y + h, x + w, y + h)
-        
-        # Center Circle Arc
-        center_circle_radius = w * (9.15 / 68.0)
-        arc_points = []
-        num_segments = 20
-        for i in range(num_segments + 1):
-            angle = math.pi + (math.pi * i / num_segments)
-            arc_x = center_x + center_circle_radius * math.cos(angle)
-            arc_y = y + h + center_circle_radius * math.sin(angle)
-            arc_points.extend([arc_x, arc_y])
-        if len(arc_points) > 2:
-            self.pitch_graphics.add(Line(points=arc_points, width=line_width))
-        self.pitch_graphics.add(Ellipse(pos=(center_x - dp(2), y + h - dp(2)), size=(dp(4), dp(4))))
-        
-        goal_width = w * (7.32 / 68.0); goal_depth = dp(8); goal_x1, goal_x2 = center_x - goal_width / 2, center_x + goal_width / 2
-        add_line(goal_x1, y, goal_x1, y - goal_depth); add_line(goal_x2, y, goal_x2, y - goal_depth); add_line(goal_x1, y - goal_depth, goal_x2, y - goal_depth)
-        pen_area_depth = h * (16.5 / 52.5); pen_area_width = w * (40.32 / 68.0); pa_x1, pa_x2 = center_x - pen_area_width / 2, center_x + pen_area_width / 2; pa_y = y + pen_area_depth
-        add_line(pa_x1, y, pa_x1, pa_y); add_line(pa_x2, y, pa_x2, pa_y); add_line(pa_x1, pa_y, pa_x2, pa_y)
-        goal_area_depth = h * (5.5 / 52.5); goal_area_width = w * (18.32 / 68.0); ga_x1, ga_x2 = center_x - goal_area_width / 2, center_x + goal_area_width / 2; ga_y = y + goal_area_depth
-        add_line(ga_x1, y, ga_x1, ga_y); add_line(ga_x2, y, ga_x2, ga_y); add_line(ga_x1, ga_y, ga_x2, ga_y)
-        
-        # Penalty Spot and Arc
-        penalty_spot_y = y + h * (11.0 / 52.5)
-        self.pitch_graphics.add(Ellipse(pos=(center_x - dp(2.5), penalty_spot_y - dp(2.5)), size=(dp(5), dp(5))))
-        arc_radius = w * (9.15 / 68.0)
-        arc_points_pen = []
-        start_angle_rad, end_angle_rad = math.radians(35), math.radians(145)
-        angle_range = end_angle_rad - start_angle_rad
-        for i in range(num_segments + 1):
-            angle = start_angle_rad + (angle_range * i / num_segments)
-            arc_x = center_x + arc_radius * math.cos(angle)
-            arc_y = penalty_spot_y + arc_radius * math.sin(angle)
-            arc_points_pen.extend([arc_x, arc_y])
-        if len(arc_points_pen) > 2:
-            self.pitch_graphics.add(Line(points=arc_points_pen, width=line_width))
+        self.pitch_graphics.add(Color(*LINE_COLOR)); line_width = dp(LINE_WIDTH)
+        polylines, dots = half_pitch_markings(x, y, w, h, unit=dp(1))
+        for points in polylines:
+            self.pitch_graphics.add(Line(points=points, width=line_width))
+        for cx, cy, r in dots:
+            self.pitch_graphics.add(Ellipse(pos=(cx - r, cy - r), size=(2 * r, 2 * r)))
         self.info_label.pos = (
             self.pitch_x + self.pitch_w - self.info_label.width - dp(5),
             self.pitch_y + self.pitch_h - self.info_label.height - dp(5)
@@ -304,33 +232,39 @@ class HalfPitchWidget(Widget):
         self.redraw_all_markers()
 
     def _draw_grass_pattern(self, x, y, w, h):
-        color1, color2 = (0.13, 0.55, 0.13, 1), (0.14, 0.58, 0.14, 1)
-        num_stripes, stripe_h = 9, h / 9
-        for i in range(num_stripes):
-            self.pitch_graphics.add(Color(*(color1 if i % 2 == 0 else color2)))
-            self.pitch_graphics.add(Rectangle(pos=(x, y + i * stripe_h), size=(w, stripe_h)))
+        for color, (sx, sy, sw, sh) in grass_stripes(x, y, w, h):
+            self.pitch_graphics.add(Color(*color))
+            self.pitch_graphics.add(Rectangle(pos=(sx, sy), size=(sw, sh)))
 
     def get_xg_value(self, rel_pos):
-        rel_x, rel_y = rel_pos
-        if rel_y <= 0.01: return 0.99
-        shot_x_m = (rel_x - 0.5) * 68.0
-        shot_y_m = rel_y * 52.5
-        distance_m = math.sqrt(shot_x_m**2 + shot_y_m**2)
-        dist_to_post1_sq = (shot_x_m - (-7.32 / 2))**2 + shot_y_m**2
-        dist_to_post2_sq = (shot_x_m - (7.32 / 2))**2 + shot_y_m**2
-        if dist_to_post1_sq == 0 or dist_to_post2_sq == 0: return 0.95
-        cos_angle = max(-1.0, min(1.0, (dist_to_post1_sq + dist_to_post2_sq - 7.32**2) / (2 * math.sqrt(dist_to_post1_sq * dist_to_post2_sq))))
-        angle_rad = math.acos(cos_angle)
-        final_xg = (0.8 * math.exp(-distance_m / 8)) * ((angle_rad / 0.7) ** 0.7)
-        return min(final_xg, 0.99)
+        return get_xg_model().xg(rel_pos)
 
     def get_xa_value(self, rel_pos):
-        rel_x, rel_y = rel_pos; x_m = (rel_x - 0.5) * 68.0; y_m = rel_y * 52.5
-        if y_m < 10 and abs(x_m) > (7.32 / 2): return 0.15 + (10 - y_m) * 0.02
-        if 16.5 < y_m < 30 and abs(x_m) < 12: return 0.08 + (30 - y_m) * 0.007
-        return min(0.12 * math.exp(-math.sqrt(x_m**2 + y_m**2) / 20), 0.15)
+        return get_xg_model().xa(rel_pos)
+
+    def marker_at(self, pos):
+        closest, closest_dist = None, dp(MARKER_GRAB_RADIUS)
+        for marker in self.markers_data:
+            if 'pos' not in marker: continue
+            dist = math.hypot(marker['pos'][0] - pos[0], marker['pos'][1] - pos[1])
+            if dist <= closest_dist: closest, closest_dist = marker, dist
+        return closest
+
+    def retype_selected(self, marker_type):
+        if self.selected_marker is None: return False
+        self.selected_marker['type'] = marker_type
+        self.update_info_label(self.selected_marker)
+        self.redraw_all_markers()
+        return True
 
     def on_touch_down(self, touch):
+        if self.parent_screen and self.parent_screen.editing and self.collide_point(*touch.pos):
+            marker = self.marker_at(touch.pos)
+            if marker is not None:
+                self.selected_marker = self.dragging_marker = marker
+                self.update_info_label(marker)
+                self.redraw_all_markers()
+                return True
         if self.drawing_direction_marker is None and self.pitch_x <= touch.x <= self.pitch_x + self.pitch_w and self.pitch_y <= touch.y <= self.pitch_y + self.pitch_h:
             rel_pos = ((touch.x - self.pitch_x) / self.pitch_w, (touch.y - self.pitch_y) / self.pitch_h)
             marker_data = {
@@ -338,14 +272,22 @@ class HalfPitchWidget(Widget):
                 'xg': self.get_xg_value(rel_pos), 'xa': self.get_xa_value(rel_pos)
             }
             self.markers_data.append(marker_data)
+            self.selected_marker = None
             self.update_info_label(marker_data)
             self.redraw_all_markers()
             self.drawing_direction_marker = marker_data
-            if self.parent_screen: self.parent_screen.update_summary()
+            if self.parent_screen:
+                self.parent_screen.events.publish(MARKER_ADDED, {'marker': {k: marker_data[k] for k in ('rel_pos', 'rel_end_pos', 'type', 'xg', 'xa')}})
             return True
         return super().on_touch_down(touch)
 
     def on_touch_move(self, touch):
+        if self.dragging_marker:
+            rel_pos = (min(max((touch.x - self.pitch_x) / self.pitch_w, 0), 1), min(max((touch.y - self.pitch_y) / self.pitch_h, 0), 1))
+            self.dragging_marker.update({'rel_pos': rel_pos, 'xg': self.get_xg_value(rel_pos), 'xa': self.get_xa_value(rel_pos)})
+            self.update_info_label(self.dragging_marker)
+            self.redraw_all_markers()
+            return True
         if self.drawing_direction_marker:
             self.direction_preview_line.clear()
             start_pos = self.drawing_direction_marker['pos']
@@ -356,9 +298,15 @@ class HalfPitchWidget(Widget):
         return super().on_touch_move(touch)
 
     def on_touch_up(self, touch):
+        if self.dragging_marker:
+            self.dragging_marker = None
+            if self.parent_screen: self.parent_screen.events.publish(MARKER_CHANGED)
+            return True
         if self.drawing_direction_marker:
             if self.pitch_x <= touch.x <= self.pitch_x + self.pitch_w and self.pitch_y <= touch.y <= self.pitch_y + self.pitch_h:
                 self.drawing_direction_marker['rel_end_pos'] = ((touch.x - self.pitch_x) / self.pitch_w, (touch.y - self.pitch_y) / self.pitch_h)
+                if self.parent_screen:
+                    self.parent_screen.events.publish(END_SET, {'rel_end_pos': self.drawing_direction_marker['rel_end_pos']})
             self.direction_preview_line.clear()
             self.drawing_direction_marker = None
             self.redraw_all_markers()
@@ -378,46 +326,52 @@ class HalfPitchWidget(Widget):
             start_pos = marker_data['pos']
             end_pos = (self.pitch_x + marker_data['rel_end_pos'][0] * self.pitch_w, self.pitch_y + marker_data['rel_end_pos'][1] * self.pitch_h)
             if start_pos != end_pos:
-                self.marker_instructions.add(Color(1, 1, 1, 0.7))
-                self.marker_instructions.add(Line(points=[start_pos[0], start_pos[1], end_pos[0], end_pos[1]], width=dp(1.2)))
-                dx, dy = end_pos[0] - start_pos[0], end_pos[1] - start_pos[1]
-                angle = math.atan2(dy, dx); arrow_len = dp(8); arrow_angle = math.pi / 6
-                p1 = (end_pos[0] - arrow_len * math.cos(angle - arrow_angle), end_pos[1] - arrow_len * math.sin(angle - arrow_angle))
-                p2 = (end_pos[0] - arrow_len * math.cos(angle + arrow_angle), end_pos[1] - arrow_len * math.sin(angle + arrow_angle))
-                self.marker_instructions.add(Triangle(points=[end_pos[0], end_pos[1], p1[0], p1[1], p2[0], p2[1]]))
+                self.marker_instructions.add(Color(*DIRECTION_COLOR))
+                self.marker_instructions.add(Line(points=[start_pos[0], start_pos[1], end_pos[0], end_pos[1]], width=dp(DIRECTION_WIDTH)))
+                self.marker_instructions.add(Triangle(points=arrow_head(start_pos, end_pos, unit=dp(1))))
+        if marker_type not in MARKER_STYLES: return
         center_x, center_y = pos[0], pos[1]
+        color, size = MARKER_STYLES[marker_type]; d = dp(size)
+        self.marker_instructions.add(Color(*color))
         if marker_type == 'goal':
-            d = dp(19); self.marker_instructions.add(Color(1, 0.84, 0, 1)); outer_radius = d / 2; inner_radius = outer_radius * 0.4
-            points = []
-            for i in range(10):
-                radius = outer_radius if i % 2 == 0 else inner_radius
-                angle = math.pi / 2 + (2 * math.pi / 10) * i
-                points.extend([center_x + radius * math.cos(angle), center_y + radius * math.sin(angle)])
+            points = star_points(center_x, center_y, d / 2)
             for i in range(10):
                 p1_idx, p2_idx = i * 2, ((i + 1) % 10) * 2
                 self.marker_instructions.add(Triangle(points=[center_x, center_y, points[p1_idx], points[p1_idx+1], points[p2_idx], points[p2_idx+1]]))
         elif marker_type == 'shot_on':
-            d = dp(10); self.marker_instructions.add(Color(0.2, 0.8, 0.2, 1)); self.marker_instructions.add(Ellipse(pos=(center_x - d/2, center_y - d/2), size=(d, d)))
+            self.marker_instructions.add(Ellipse(pos=(center_x - d/2, center_y - d/2), size=(d, d)))
         elif marker_type == 'shot_off':
-            d = dp(10); self.marker_instructions.add(Color(0.9, 0.1, 0.1, 1)); size = d; half_size = size / 2; x_width = dp(2)
+            half_size = d / 2; x_width = dp(SHOT_OFF_STROKE)
             self.marker_instructions.add(Line(points=[center_x - half_size, center_y - half_size, center_x + half_size, center_y + half_size], width=x_width))
             self.marker_instructions.add(Line(points=[center_x - half_size, center_y + half_size, center_x + half_size, center_y - half_size], width=x_width))
         elif marker_type == 'assist':
-            d = dp(10); self.marker_instructions.add(Color(0.1, 0.7, 1, 1)); size = d
-            self.marker_instructions.add(Rectangle(pos=(center_x - size/2, center_y - size/2), size=(size, size)))
+            self.marker_instructions.add(Rectangle(pos=(center_x - d/2, center_y - d/2), size=(d, d)))
 
     def redraw_all_markers(self):
         self.marker_instructions.clear()
         for marker in self.markers_data:
             marker['pos'] = (self.pitch_x + marker['rel_pos'][0] * self.pitch_w, self.pitch_y + marker['rel_pos'][1] * self.pitch_h)
             self.draw_marker_graphic(marker)
+            if marker is self.selected_marker:
+                self.marker_instructions.add(Color(1, 1, 1, 0.9))
+                self.marker_instructions.add(Line(circle=(marker['pos'][0], marker['pos'][1], dp(11)), width=dp(1.2)))
 
     def clear_markers(self):
         self.markers_data.clear()
+        self.selected_marker = self.dragging_marker = None
         self.update_info_label(None)
         self.redraw_all_markers()
 
+    def load_markers(self, markers):
+        self.markers_data[:] = markers
+        self.drawing_direction_marker = None
+        self.selected_marker = self.dragging_marker = None
+        self.direction_preview_line.clear()
+        self.redraw_all_markers()
+        self.update_info_label(self.markers_data[-1] if self.markers_data else None)
+
     def undo_last_marker(self):
+        self.selected_marker = self.dragging_marker = None
         if self.drawing_direction_marker:
             self.markers_data.pop()
             self.drawing_direction_marker = None
@@ -442,6 +396,15 @@ class AddStatScreen(MDScreen):
         self.selected_date = date.today()
         self.selected_time = datetime.now().time()
         self.performance_rating = 6.0
+        self.journal = None
+        self.journal_event = None
+        self.editing = None  # path of the saved session being corrected, if any
+        self.editing_base = None
+        self.editing_form = None  # form_session_info() as the edited session was loaded into it
+        # Widgets publish taps here; the journal and summary get one batch per frame
+        self.events = EventBus()
+        self.events.subscribe(MARKER_TOPICS, self.on_marker_events)
+        self.events.subscribe((POSITION_SELECTED,), self.on_position_events)
 
         self.root_scroll = ScrollView(do_scroll_x=False)
         main_layout = MDBoxLayout(orientation='vertical', padding=dp(15), spacing=dp(12), size_hint_y=None)
@@ -453,6 +416,8 @@ class AddStatScreen(MDScreen):
         self.date_button = MDRectangleFlatButton(text=self.selected_date.strftime('%Y-%m-%d'), on_release=self.show_date_picker)
         self.time_button = MDRectangleFlatButton(text=self.selected_time.strftime('%H:%M'), on_release=self.show_time_picker)
         self.game_type_button = MDRectangleFlatButton(text=self.selected_game_type)
+        self.minutes_field = MDTextField(hint_text="e.g. 90", input_filter="int", max_text_length=3)
+        self.note_field = MDTextField(hint_text="e.g. wet pitch")
         game_type_items = [{"text": gt, "on_release": lambda x=gt: self.set_game_type(x)} for gt in ["Fun Game", "Training", "Match"]]
         self.game_type_menu = MDDropdownMenu(caller=self.game_type_button, items=game_type_items, width_mult=4)
         self.game_type_button.on_release = self.game_type_menu.open
@@ -476,6 +441,8 @@ class AddStatScreen(MDScreen):
         add_form_row("Date:", self.date_button)
         add_form_row("Time:", self.time_button)
         add_form_row("Game Type:", self.game_type_button)
+        add_form_row("Minutes Played:", self.minutes_field)
+        add_form_row("Note:", self.note_field)
         session_card.add_widget(form_grid)
         main_layout.add_widget(session_card)
 
@@ -534,6 +501,83 @@ class AddStatScreen(MDScreen):
         self.select_marker_type('shot_on')
         self.update_summary()
 
+    def on_enter(self, *args):
+        if self.editing: return  # the draft journal is only for new sessions
+        self.start_journal()
+
+    def start_journal(self):
+        """Opens (or restores) the current user's draft and starts the periodic flush."""
+        username = getattr(MDApp.get_running_app(), "current_user", None) or "default_user"
+        if self.journal is None or not self.journal.folder.endswith(os.sep + username):
+            if self.journal: self.journal.flush(); self.journal.close()
+            self.journal = DraftJournal(username)
+            markers = self.journal.restore()
+            self.pitch_widget.load_markers(markers)
+            self.update_summary()
+            if markers: toast(f"Restored unsaved session ({len(markers)} events)")
+        if self.journal_event is None:
+            self.journal_event = Clock.schedule_interval(self.journal.flush, JOURNAL_FLUSH_INTERVAL)
+
+    def on_leave(self, *args):
+        self.events.flush()
+        if self.journal_event is not None:
+            self.journal_event.cancel(); self.journal_event = None
+        if self.journal: self.journal.flush()
+        if self.editing: self.finish_editing()  # unsaved corrections are dropped
+
+    def on_marker_events(self, batch):
+        if self.journal and not self.editing:
+            for topic, payload in batch:
+                if topic in DRAFT_OPS: self.journal.append(dict(payload, op=DRAFT_OPS[topic]))
+        self.update_summary()
+
+    def on_position_events(self, batch):
+        self.set_position_from_pitch(batch[-1][1]['position'])  # only the last pick in a burst matters
+
+    def edit_session(self, path):
+        """Loads a saved session for correcting; save_stat() then stores only the changes."""
+        data = session_cache.get(path)  # usually warm: the prefetcher loads the recent sessions
+        if data is None:
+            toast("Could not open session"); return False
+        info = data["session_info"]
+        self.editing, self.editing_base = path, data
+        self.on_date_save(None, date.fromisoformat(info["date"]), None)
+        self.on_time_save(None, time.fromisoformat(info["time"]))
+        self.selected_game_type = self.game_type_button.text = info.get("game_type", "Match")
+        self.minutes_field.text = str(info.get("time_played") or "")
+        self.note_field.text = info.get("note") or ""
+        self.set_formation(info.get("formation") or "4-4-2")
+        position = info.get("position")
+        self.position_pitch_widget.selected_position_name = position if position != "N/A" else None
+        self.position_pitch_widget.redraw_position_nodes()
+        self.set_position_from_pitch(self.position_pitch_widget.selected_position_name)
+        if info.get("role") and info["role"] != "N/A": self.set_role(info["role"])
+        self.pitch_widget.load_markers([normalise_event(e) for e in data.get("events") or []])
+        self.update_summary()
+        # The form fills in defaults (formation, role) for fields the session never
+        # recorded; only what the user then changes counts as an edit
+        self.editing_form = self.form_session_info()
+        toast(f"Editing {os.path.basename(path)}: tap a marker to move or retype it")
+        return True
+
+    def finish_editing(self):
+        self.editing, self.editing_base, self.editing_form = None, None, None
+        self.reset_form()
+        self.pitch_widget.load_markers(self.journal.restore() if self.journal else [])
+        self.update_summary()
+        # Still on this screen (the edit was saved): carry on with the draft as on_enter would
+        if self.manager and self.manager.current == self.name:
+            self.start_journal()
+
+    def reset_form(self):
+        """Session details back to new-session defaults."""
+        self.on_date_save(None, date.today(), None)
+        self.on_time_save(None, datetime.now().time())
+        self.set_game_type("Match")
+        self.minutes_field.text = ""
+        self.note_field.text = ""
+        self.set_formation("4-4-2")  # also clears position and role
+
     def show_date_picker(self, *args):
         date_dialog = MDDatePicker(year=self.selected_date.year, month=self.selected_date.month, day=self.selected_date.day)
         date_dialog.bind(on_save=self.on_date_save)
@@ -576,6 +620,7 @@ class AddStatScreen(MDScreen):
         if self.role_menu: self.role_menu.dismiss()
 
     def select_marker_type(self, marker_type):
+        if self.editing and self.pitch_widget.retype_selected(marker_type): self.events.publish(MARKER_CHANGED)
         self.pitch_widget.current_marker_type = marker_type
         for key, button in self.event_buttons.items():
             is_selected = (key == marker_type)
@@ -612,7 +657,8 @@ class AddStatScreen(MDScreen):
 
     def undo_last(self, instance):
         if self.pitch_widget.undo_last_marker():
-            toast("Last event removed"); self.update_summary()
+            self.events.publish(MARKER_UNDONE)
+            toast("Last event removed")
         else:
             toast("Nothing to undo")
 
@@ -624,44 +670,93 @@ class AddStatScreen(MDScreen):
     def clear_all(self, instance):
         if self.dialog: self.dialog.dismiss()
         self.pitch_widget.clear_markers()
-        self.update_summary()
+        self.events.publish(CLEARED)
         toast("All data cleared")
 
+    def form_session_info(self):
+        return {
+            "game_type": self.selected_game_type,
+            "formation": self.formation_button.text,
+            "position": self.selected_position,
+            "role": self.selected_role,
+            "date": self.selected_date.isoformat(),
+            "time": self.selected_time.strftime("%H:%M:%S"),
+            "time_played": int(self.minutes_field.text) if self.minutes_field.text.strip() else "",
+            "note": self.note_field.text.strip(),
+        }
+
+    def minutes_error(self):
+        """Why the minutes field can't be saved, or None."""
+        text = self.minutes_field.text.strip()
+        if text and not (text.isdigit() and int(text) <= MAX_MINUTES_PLAYED):
+            return f"Minutes played must be a number from 0 to {MAX_MINUTES_PLAYED}"
+        return None
+
     def save_stat(self, instance):
         app = MDApp.get_running_app()
         username = getattr(app, "current_user", "default_user")
-        folder_path = os.path.join("data", "matches_history", username)
+        error = self.minutes_error()
+        if error:
+            toast(error); return
+        if self.editing:
+            self.save_edits(username); return
+        folder_path = os.path.join(MATCH_BASE_DIR, username)
         os.makedirs(folder_path, exist_ok=True)
         session_dt = datetime.combine(self.selected_date, self.selected_time)
-        filename = f"session_{session_dt.strftime('%Y%m%d_%H%M%S')}.json"
-        file_path = os.path.join(folder_path, filename)
+        session_id = uuid.uuid4().hex
 
         markers = self.pitch_widget.markers_data
         events_to_save = [{'rel_pos': m['rel_pos'], 'rel_end_pos': m.get('rel_end_pos'), 'type': m['type'], 'xg': m.get('xg'), 'xa': m.get('xa')} for m in markers]
         
         data = {
-            "session_info": {
-                "game_type": self.selected_game_type,
-                "formation": self.formation_button.text,
-                "position": self.selected_position,
-                "role": self.selected_role,
-                "date": self.selected_date.isoformat(),
-                "time": self.selected_time.strftime("%H:%M:%S"),
-            },
-            "stats": {
-                "goals": sum(1 for m in markers if m['type'] == 'goal'),
-                "assists": sum(1 for m in markers if m['type'] == 'assist'),
-                "shots_on_target": sum(1 for m in markers if m['type'] in ['shot_on', 'goal']),
-                "shots_off_target": sum(1 for m in markers if m['type'] == 'shot_off'),
-                "total_xg": sum(m.get('xg', 0) for m in markers if m['type'] in ['shot_on', 'shot_off', 'goal']),
-                "total_xa": sum(m.get('xa', 0) for m in markers if m['type'] == 'assist'),
-            },
+            "session_info": dict(self.form_session_info(), xg_model_version=CURRENT_MODEL_VERSION, session_id=session_id),
+            "stats": stats_from_events(markers),
             "events": events_to_save
         }
+        errors = validate_session(data)
+        if errors:
+            toast(f"Can't save: {errors[0]}"); return
+
+        content_hash = session_content_hash(data)
+        hash_index = get_hash_index(username)  # refreshed when first loaded, kept current by add()
+        existing = hash_index.find(content_hash)
+        if existing:
+            toast(f"Already saved as {os.path.basename(existing)}")
+            return
+
+        # Same picked date/time as another session: keep both, told apart by the ID
+        filename = f"session_{session_dt.strftime('%Y%m%d_%H%M%S')}.json"
+        if os.path.exists(os.path.join(folder_path, filename)):
+            filename = f"session_{session_dt.strftime('%Y%m%d_%H%M%S')}_{session_id[:8]}.json"
+        file_path = os.path.join(folder_path, filename)
 
         try:
-            with open(file_path, "w") as f:
-                json.dump(data, f, indent=4)
+            save_session(file_path, data)
+            hash_index.add(filename, content_hash)
+            get_search_index(username).update(filename, data)
+            record_saved_session(username, file_path)
+            # The markers stay on the pitch, so the draft must keep matching them
+            if self.journal: self.journal.reset(events_to_save)
             toast(f"Stats saved to {filename}")
         except Exception as e:
-            toast(f"Error saving file: {e}")
\ No newline at end of file
+            toast(f"Error saving file: {e}")
+
+    def save_edits(self, username):
+        """Appends the corrections as patch records; caches pick up just this session."""
+        path = self.editing
+        touched = {k: v for k, v in self.form_session_info().items() if v != self.editing_form.get(k)}
+        edited = {"session_info": touched, "events": self.pitch_widget.markers_data}
+        records = diff_session(self.editing_base, edited)
+        if not records:
+            toast("No changes to save"); return
+        try:
+            append_patches(path, records)
+            data = load_session(path)
+            name = os.path.relpath(path, os.path.join(MATCH_BASE_DIR, username))
+            get_hash_index(username).add(name, session_content_hash(data))
+            get_search_index(username).update(name, data)
+            record_saved_session(username, path)
+            toast(f"Saved {len(records)} changes to {os.path.basename(path)}")
+        except Exception as e:
+            toast(f"Error saving changes: {e}"); return
+        self.finish_editing()
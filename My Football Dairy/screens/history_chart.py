@@ -0,0 +1,138 @@
+# screens/history_chart.py
+import numpy as np
+
+from kivy.uix.widget import Widget
+from kivy.uix.label import Label as KivyLabel
+from kivy.graphics import Color, Line, Rectangle, InstructionGroup
+from kivy.metrics import dp
+from kivy.clock import Clock
+
+from utils.downsample import SeriesPyramid
+
+MIN_VISIBLE_SESSIONS = 5
+ZOOM_STEP = 1.25
+
+
+class HistoryChartWidget(Widget):
+    """
+    Line chart of per-session series across a player's whole history, drawn
+    with canvas instructions. Each redraw asks the series pyramids for at most
+    one point per horizontal pixel of the visible range, so the vertex count
+    stays bounded however many sessions there are. Drag pans, the mouse wheel
+    or a pinch zooms, double tap resets.
+    """
+    def __init__(self, title="", **kwargs):
+        super().__init__(**kwargs)
+        self.title = title
+        self.series = []  # (label, rgba, SeriesPyramid)
+        self.dates = []
+        self.view = (0.0, 0.0)  # visible session index range
+        self._touches = []
+        self.chart_graphics = InstructionGroup()
+        self.canvas.add(self.chart_graphics)
+        self.caption = KivyLabel(text=title, font_size='11sp', size_hint=(None, None), color=(1, 1, 1, 0.9), halign='left', valign='top')
+        self.add_widget(self.caption)
+        self._redraw_trigger = Clock.create_trigger(self.redraw)  # many touch moves, one redraw per frame
+        self.bind(size=self._redraw_trigger, pos=self._redraw_trigger)
+
+    def set_series(self, dates, series):
+        """series: [(label, rgba, values)], one value per session in `dates` order."""
+        self.dates = list(dates)
+        self.series = [(label, color, SeriesPyramid(values)) for label, color, values in series]
+        self.reset_view()
+
+    def reset_view(self):
+        self.view = (0.0, float(max(len(self.dates) - 1, 0)))
+        self._redraw_trigger()
+
+    def _plot_rect(self):
+        pad = dp(6)
+        return self.x + pad, self.y + pad, self.width - 2 * pad, self.height - 2 * pad - dp(16)
+
+    def redraw(self, *args):
+        self.chart_graphics.clear()
+        x, y, w, h = self._plot_rect()
+        self.chart_graphics.add(Color(0.15, 0.15, 0.15, 1))
+        self.chart_graphics.add(Rectangle(pos=(self.x, self.y), size=self.size))
+        self.caption.size = (self.width - dp(12), dp(16))
+        self.caption.text_size = self.caption.size
+        self.caption.pos = (self.x + dp(6), self.top - dp(18))
+        if len(self.dates) < 2 or w <= 0 or h <= 0:
+            self.caption.text = f"{self.title}: not enough sessions yet"
+            return
+
+        v0, v1 = self.view
+        visible = [(label, color, pyramid.query(v0, v1, w)) for label, color, pyramid in self.series]
+        y_min = min(float(ys.min()) for _, _, (_, ys) in visible)
+        y_max = max(float(ys.max()) for _, _, (_, ys) in visible)
+        if y_max - y_min < 1e-9:
+            y_max = y_min + 1.0
+
+        self.chart_graphics.add(Color(1, 1, 1, 0.25))
+        self.chart_graphics.add(Line(points=[x, y, x + w, y], width=dp(1)))
+        for label, color, (xs, ys) in visible:
+            px = x + (xs - v0) / (v1 - v0) * w
+            py = y + (ys - y_min) / (y_max - y_min) * h
+            self.chart_graphics.add(Color(*color))
+            self.chart_graphics.add(Line(points=np.column_stack((px, py)).ravel().tolist(), width=dp(1.2)))
+
+        first, last = self.dates[int(np.ceil(v0))], self.dates[int(v1)]
+        legend = "  ".join(f"[color={_hex(color)}]{label}[/color]" for label, color, _ in self.series)
+        self.caption.markup = True
+        self.caption.text = f"{self.title}  {legend}   {first} - {last}   max {y_max:.1f}"
+
+    # --- Zoom and pan ---
+
+    def _set_view(self, v0, v1):
+        last = float(len(self.dates) - 1)
+        span = min(max(v1 - v0, min(MIN_VISIBLE_SESSIONS, last)), last)
+        v0 = min(max(v0, 0.0), last - span)
+        self.view = (v0, v0 + span)
+        self._redraw_trigger()
+
+    def zoom(self, factor, anchor_x):
+        """factor > 1 zooms in around the session under widget x-coordinate anchor_x."""
+        x, _, w, _ = self._plot_rect()
+        v0, v1 = self.view
+        anchor = v0 + (min(max(anchor_x - x, 0), w) / w) * (v1 - v0)
+        self._set_view(anchor - (anchor - v0) / factor, anchor + (v1 - anchor) / factor)
+
+    def on_touch_down(self, touch):
+        if not self.collide_point(*touch.pos) or len(self.dates) < 2:
+            return super().on_touch_down(touch)
+        if touch.is_mouse_scrolling:
+            self.zoom(ZOOM_STEP if touch.button == 'scrolldown' else 1 / ZOOM_STEP, touch.x)
+            return True
+        if touch.is_double_tap:
+            self.reset_view()
+            return True
+        touch.grab(self)
+        self._touches.append(touch)
+        return True
+
+    def on_touch_move(self, touch):
+        if touch.grab_current is not self:
+            return super().on_touch_move(touch)
+        if len(self._touches) == 2:
+            other = self._touches[0] if self._touches[1] is touch else self._touches[1]
+            before, after = abs(touch.px - other.x), abs(touch.x - other.x)
+            if before > dp(10) and after > dp(10):
+                self.zoom(after / before, (touch.x + other.x) / 2)
+        elif len(self._touches) == 1:
+            _, _, w, _ = self._plot_rect()
+            v0, v1 = self.view
+            shift = -touch.dx / w * (v1 - v0)
+            self._set_view(v0 + shift, v1 + shift)
+        return True
+
+    def on_touch_up(self, touch):
+        if touch.grab_current is not self:
+            return super().on_touch_up(touch)
+        touch.ungrab(self)
+        if touch in self._touches:
+            self._touches.remove(touch)
+        return True
+
+
+def _hex(color):
+    return "".join(f"{int(c * 255):02x}" for c in color[:3])
@@ -6,6 +6,8 @@ from kivymd.uix.boxlayout import MDBoxLayout
 from kivymd.uix.label import MDLabel
 from kivymd.uix.button import MDRaisedButton
 
+from utils.prefetch import session_cache
+
 class HomeScreen(MDScreen):
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
@@ -50,5 +52,9 @@ class HomeScreen(MDScreen):
 
     def logout(self, instance):
         app = MDApp.get_running_app()
+        if app.prefetcher:
+            app.prefetcher.cancel()
+            app.prefetcher = None
+        session_cache.clear()
         app.current_user = None
         self.manager.current = 'login'
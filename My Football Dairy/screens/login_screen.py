@@ -1,17 +1,15 @@
-import os
-import json
-import hashlib
 from kivymd.app import MDApp
 from kivymd.uix.screen import MDScreen
 from kivymd.uix.boxlayout import MDBoxLayout
 from kivymd.uix.label import MDLabel
 from kivymd.uix.textfield import MDTextField
 from kivymd.uix.button import MDRaisedButton, MDFlatButton
+from kivymd.uix.spinner import MDSpinner
 from kivymd.toast import toast
 from kivy.metrics import dp
 
-USERS_JSON_PATH = os.path.join("data", "registered_user", "users.json")
-MATCH_BASE_DIR = os.path.join("data", "matches_history")
+from utils.auth import run_in_worker, user_store
+from utils.prefetch import start_prefetch
 
 class LoginScreen(MDScreen):
     def __init__(self, **kwargs):
@@ -43,12 +41,19 @@ class LoginScreen(MDScreen):
             icon_right="key-variant"
         )
 
-        login_button = MDRaisedButton(
+        self.login_button = MDRaisedButton(
             text="LOGIN",
             on_release=self.login,
             pos_hint={'center_x': 0.5}
         )
 
+        self.spinner = MDSpinner(
+            size_hint=(None, None),
+            size=(dp(32), dp(32)),
+            pos_hint={'center_x': 0.5},
+            active=False
+        )
+
         register_button = MDFlatButton(
             text="Don't have an account? Register",
             on_release=self.go_to_register,
@@ -58,20 +63,12 @@ class LoginScreen(MDScreen):
         layout.add_widget(title)
         layout.add_widget(self.email_field)
         layout.add_widget(self.password_field)
-        layout.add_widget(login_button)
+        layout.add_widget(self.login_button)
+        layout.add_widget(self.spinner)
         layout.add_widget(register_button)
 
         self.add_widget(layout)
 
-    def load_users(self):
-        if os.path.exists(USERS_JSON_PATH):
-            try:
-                with open(USERS_JSON_PATH, "r") as f:
-                    return json.load(f)
-            except json.JSONDecodeError:
-                return []
-        return []
-
     def login(self, instance):
         email = self.email_field.text.strip()
         password = self.password_field.text.strip()
@@ -80,31 +77,33 @@ class LoginScreen(MDScreen):
             toast("Please enter email and password")
             return
 
-        users = self.load_users()
-        if not users:
-            toast("No users registered. Please register an account.")
-            return
+        # Hashing and file access happen on the auth pool; on_login_result runs back on the UI thread
+        self.set_busy(True)
+        run_in_worker(user_store.authenticate, self.on_login_result, email, password)
 
-        hashed_input_password = hashlib.sha256(password.encode()).hexdigest()
+    def set_busy(self, busy):
+        self.spinner.active = busy
+        self.login_button.disabled = busy
 
-        for user in users:
-            if user.get("email") == email:
-                if user.get("password") == hashed_input_password:
-                    app = MDApp.get_running_app()
-                    app.current_user = user.get("username")
-
-                    # Ensure matches_history/{username} exists
-                    user_history_dir = os.path.join(MATCH_BASE_DIR, app.current_user)
-                    os.makedirs(user_history_dir, exist_ok=True)
-
-                    toast(f"Welcome back, {app.current_user}!")
-                    self.manager.current = 'home'
-                    return
-                else:
-                    toast("Incorrect password")
-                    return
+    def on_login_result(self, result, error):
+        self.set_busy(False)
+        if error:
+            toast(f"Login failed: {error}")
+            return
 
-        toast("User with this email not found")
+        status, username = result
+        if status == "no_users":
+            toast("No users registered. Please register an account.")
+        elif status == "not_found":
+            toast("User with this email not found")
+        elif status == "bad_password":
+            toast("Incorrect password")
+        else:
+            app = MDApp.get_running_app()
+            app.current_user = username
+            app.prefetcher = start_prefetch(username)
+            toast(f"Welcome back, {app.current_user}!")
+            self.manager.current = 'home'
 
     def go_to_register(self, instance):
         self.manager.current = 'register'
@@ -1,8 +1,26 @@
 # screens/player_screen.py
+import math
+import os
+
+from kivymd.app import MDApp
 from kivymd.uix.screen import MDScreen
 from kivymd.uix.label import MDLabel
 from kivymd.uix.button import MDRaisedButton
 from kivymd.uix.boxlayout import MDBoxLayout
+from kivymd.uix.list import MDList, OneLineListItem
+from kivymd.uix.textfield import MDTextField
+from kivy.uix.scrollview import ScrollView
+from kivy.metrics import dp
+from kivy.clock import Clock
+
+from models.player_model import ROLLING_WINDOW, get_player_history
+from screens.history_chart import HistoryChartWidget
+from utils.helpers import MATCH_BASE_DIR
+from utils.search_index import get_search_index
+
+RECENT_SESSIONS_SHOWN = 10
+SEARCH_RESULTS_SHOWN = 50
+GOALS_COLOR, XG_COLOR = (1, 0.84, 0, 1), (0.3, 0.8, 1, 1)
 
 class PlayerScreen(MDScreen):
     def __init__(self, **kwargs):
@@ -16,15 +34,96 @@ class PlayerScreen(MDScreen):
             font_style='H5'
         )
 
+        self.summary_label = MDLabel(
+            text="",
+            halign='center',
+            theme_text_color='Secondary'
+        )
+
         back_btn = MDRaisedButton(
             text="Back to Home",
             pos_hint={"center_x": 0.5},
             on_release=self.go_home
         )
 
+        # Whole-history charts: cumulative goals vs xG, and rolling form
+        self.cumulative_chart = HistoryChartWidget(title="Goals vs xG", size_hint_y=None, height=dp(160))
+        self.form_chart = HistoryChartWidget(title=f"Form (last {ROLLING_WINDOW})", size_hint_y=None, height=dp(120))
+        self.charted = None  # history arrays the charts were built from
+
+        # Recent sessions, or search results while there is a query;
+        # tapping one reopens it in AddStatScreen for corrections
+        self.search_field = MDTextField(hint_text="Search: mezzala 3-5-2 wet, role:winger, from:2025-07-01")
+        self._search_trigger = Clock.create_trigger(self.show_sessions, 0.15)  # one lookup per typing pause
+        self.search_field.bind(text=self._search_trigger)
+        self.sessions_list = MDList()
+        sessions_scroll = ScrollView()
+        sessions_scroll.add_widget(self.sessions_list)
+
         layout.add_widget(label)
+        layout.add_widget(self.summary_label)
+        layout.add_widget(self.cumulative_chart)
+        layout.add_widget(self.form_chart)
+        layout.add_widget(self.search_field)
+        layout.add_widget(sessions_scroll)
         layout.add_widget(back_btn)
         self.add_widget(layout)
 
+    def on_enter(self, *args):
+        username = MDApp.get_running_app().current_user
+        if not username:
+            self.summary_label.text = "No user logged in."
+            self.sessions_list.clear_widgets()
+            return
+        history = get_player_history(username)
+        totals, per_90 = history.totals(), history.per_90()
+
+        def rate(value):
+            return "--" if math.isnan(value) else f"{value:.2f}"
+
+        self.summary_label.text = (
+            f"Sessions: {totals['sessions']}\n"
+            f"Goals: {totals['goals']:.0f}   Assists: {totals['assists']:.0f}\n"
+            f"xG: {totals['xg']:.2f}   xA: {totals['xa']:.2f}   Shots: {totals['shots']:.0f}\n\n"
+            f"Per 90 ({per_90['minutes']:.0f} min over {per_90['sessions_with_minutes']} sessions)\n"
+            f"Goals: {rate(per_90['goals'])}   xG: {rate(per_90['xg'])}\n"
+            f"xA: {rate(per_90['xa'])}   Shots: {rate(per_90['shots'])}"
+        )
+
+        # Pyramids are only rebuilt when the history itself changed
+        if self.charted is not history.cumulative['goals']:
+            self.charted = history.cumulative['goals']
+            self.cumulative_chart.set_series(history.dates, [
+                ("Goals", GOALS_COLOR, history.cumulative['goals']), ("xG", XG_COLOR, history.cumulative['xg'])])
+            self.form_chart.set_series(history.dates, [
+                ("Goals", GOALS_COLOR, history.rolling_mean('goals')), ("xG", XG_COLOR, history.rolling_mean('xg'))])
+
+        self.show_sessions()
+
+    def show_sessions(self, *args):
+        self.sessions_list.clear_widgets()
+        username = MDApp.get_running_app().current_user
+        if not username:
+            return
+        history = get_player_history(username)
+        query = self.search_field.text.strip()
+        if query:
+            names = get_search_index(username).search(query, limit=SEARCH_RESULTS_SHOWN)
+        else:
+            names = list(reversed(history.names[-RECENT_SESSIONS_SHOWN:]))
+        for name in names:
+            row = history.rows.get(name)
+            if row is None:
+                continue  # duplicate or unreadable: not part of the history
+            self.sessions_list.add_widget(OneLineListItem(
+                text=f"{row['date']}   Goals: {row['goals']}   xG: {row['xg']:.2f}",
+                on_release=lambda x, n=name: self.edit_session(username, n)
+            ))
+
+    def edit_session(self, username, name):
+        add_stat = self.manager.get_screen('add_stat')
+        if add_stat.edit_session(os.path.join(MATCH_BASE_DIR, username, name)):
+            self.manager.current = 'add_stat'
+
     def go_home(self, instance):
         self.manager.current = 'home'
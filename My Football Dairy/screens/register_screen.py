@@ -1,17 +1,16 @@
 import os
-import json
-import hashlib
 import re
 from kivymd.uix.screen import MDScreen
 from kivymd.uix.boxlayout import MDBoxLayout
 from kivymd.uix.label import MDLabel
 from kivymd.uix.textfield import MDTextField
 from kivymd.uix.button import MDRaisedButton, MDFlatButton
+from kivymd.uix.spinner import MDSpinner
 from kivymd.toast import toast
 from kivy.metrics import dp
 
-USERS_JSON_PATH = os.path.join("data", "registered_user", "users.json")
-MATCH_BASE_DIR = os.path.join("data", "matches_history")
+from utils.auth import run_in_worker, user_store
+from utils.helpers import MATCH_BASE_DIR, USERS_JSON_PATH
 
 class RegisterScreen(MDScreen):
     def __init__(self, **kwargs):
@@ -47,12 +46,19 @@ class RegisterScreen(MDScreen):
             icon_right="key-variant"
         )
 
-        register_button = MDRaisedButton(
+        self.register_button = MDRaisedButton(
             text="REGISTER",
             on_release=self.register,
             pos_hint={'center_x': 0.5}
         )
 
+        self.spinner = MDSpinner(
+            size_hint=(None, None),
+            size=(dp(32), dp(32)),
+            pos_hint={'center_x': 0.5},
+            active=False
+        )
+
         login_button = MDFlatButton(
             text="Already have an account? Login",
             on_release=self.go_to_login,
@@ -63,7 +69,8 @@ class RegisterScreen(MDScreen):
         layout.add_widget(self.username_field)
         layout.add_widget(self.email_field)
         layout.add_widget(self.password_field)
-        layout.add_widget(register_button)
+        layout.add_widget(self.register_button)
+        layout.add_widget(self.spinner)
         layout.add_widget(login_button)
 
         self.add_widget(layout)
@@ -78,22 +85,6 @@ class RegisterScreen(MDScreen):
     def is_valid_password(self, password):
         return len(password) >= 6
 
-    def load_users(self):
-        if os.path.exists(USERS_JSON_PATH):
-            with open(USERS_JSON_PATH, "r") as f:
-                try:
-                    return json.load(f)
-                except json.JSONDecodeError:
-                    return []
-        return []
-
-    def save_users(self, users):
-        with open(USERS_JSON_PATH, "w") as f:
-            json.dump(users, f, indent=4)
-
-    def is_username_taken(self, username, users):
-        return any(user["username"] == username for user in users)
-
     def clear_fields(self):
         self.username_field.text = ""
         self.email_field.text = ""
@@ -116,34 +107,23 @@ class RegisterScreen(MDScreen):
             toast("Password must be at least 6 characters")
             return
 
-        users = self.load_users()
+        self.spinner.active, self.register_button.disabled = True, True
+        run_in_worker(user_store.register, lambda result, error: self.on_register_result(username, result, error),
+                      username, email, password)
 
-        if self.is_username_taken(username, users):
+    def on_register_result(self, username, result, error):
+        self.spinner.active, self.register_button.disabled = False, False
+        if error:
+            toast(f"Registration failed: {str(error)}")
+            return
+        if result == "username_taken":
             toast("Username already exists!")
             return
 
-        try:
-            # Create match history folder for this user
-            os.makedirs(os.path.join(MATCH_BASE_DIR, username), exist_ok=True)
-
-            hashed_password = hashlib.sha256(password.encode()).hexdigest()
-
-            new_user = {
-                "username": username,
-                "email": email,
-                "password": hashed_password
-            }
-
-            users.append(new_user)
-            self.save_users(users)
-
-            toast(f"User {username} registered!")
-            self.clear_fields()
-            # Redirect to login page after registration
-            self.manager.current = "login"
-
-        except Exception as e:
-            toast(f"Registration failed: {str(e)}")
+        toast(f"User {username} registered!")
+        self.clear_fields()
+        # Redirect to login page after registration
+        self.manager.current = "login"
 
     def go_to_login(self, instance):
         self.manager.current = "login"
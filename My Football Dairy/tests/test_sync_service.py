@@ -0,0 +1,199 @@
+# tests/test_sync_service.py
+#
+#   python -m pytest tests    (from the "My Football Dairy" folder)
+import asyncio
+import json
+import os
+import tempfile
+import time
+import unittest
+
+from models.match_model import stats_from_events
+from utils.archive import seal_season
+from utils.helpers import list_session_files, load_session
+from utils.sync_service import SyncClient, SyncServer
+
+
+def make_session(date, goals=1):
+    events = [{"rel_pos": [0.5, 0.2], "rel_end_pos": None, "type": "goal", "xg": 0.3, "xa": None}] * goals
+    return {
+        "session_info": {"game_type": "Match", "position": "Striker", "date": date, "time": "18:00:00"},
+        "stats": stats_from_events(events),
+        "events": events,
+    }
+
+
+def write_session(folder, name, data):
+    os.makedirs(folder, exist_ok=True)
+    with open(os.path.join(folder, name), "w") as f:
+        json.dump(data, f)
+
+
+def read_session(folder, name):
+    with open(os.path.join(folder, name), "r") as f:
+        return json.load(f)
+
+
+class SyncRoundTripTest(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.root = self._tmp.name
+        self.server_dir = os.path.join(self.root, "server")
+        self.laptop_dir = os.path.join(self.root, "laptop")
+        self.phone_dir = os.path.join(self.root, "phone")
+        self.state_dir = os.path.join(self.root, "state")
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def client(self, device, base_dir, port):
+        return SyncClient(device, port=port, base_dir=base_dir, state_dir=self.state_dir)
+
+    def run_sync(self, steps):
+        async def run():
+            server = await SyncServer(self.server_dir, port=0).start()
+            try:
+                return [await step(server.port) for step in steps]
+            finally:
+                await server.close()
+        return asyncio.run(run())
+
+    def test_push_then_pull_between_devices(self):
+        write_session(os.path.join(self.laptop_dir, "t"), "session_a.json", make_session("2025-07-01"))
+        write_session(os.path.join(self.laptop_dir, "u"), "session_b.json", make_session("2025-07-02"))
+
+        pushed, pulled = self.run_sync([
+            lambda port: self.client("laptop", self.laptop_dir, port).sync(),
+            lambda port: self.client("phone", self.phone_dir, port).sync(["t", "u"]),
+        ])
+        self.assertEqual(pushed, (2, 0))
+        self.assertEqual(pulled, (0, 2))
+        self.assertEqual(read_session(os.path.join(self.phone_dir, "t"), "session_a.json")["session_info"]["date"], "2025-07-01")
+
+        # A second sync with nothing changed exchanges nothing
+        again = self.run_sync([lambda port: self.client("phone", self.phone_dir, port).sync(["t", "u"])])
+        self.assertEqual(again, [(0, 0)])
+
+    def test_edit_on_one_device_reaches_the_other(self):
+        laptop_t = os.path.join(self.laptop_dir, "t")
+        write_session(laptop_t, "session_a.json", make_session("2025-07-01"))
+        self.run_sync([
+            lambda port: self.client("laptop", self.laptop_dir, port).sync(),
+            lambda port: self.client("phone", self.phone_dir, port).sync(["t"]),
+        ])
+
+        time.sleep(0.01)  # the edit must land after the laptop's push watermark
+        write_session(laptop_t, "session_a.json", make_session("2025-07-01", goals=3))
+        results = self.run_sync([
+            lambda port: self.client("laptop", self.laptop_dir, port).sync(),
+            lambda port: self.client("phone", self.phone_dir, port).sync(["t"]),
+        ])
+        self.assertEqual(results, [(1, 0), (0, 1)])
+        self.assertEqual(read_session(os.path.join(self.phone_dir, "t"), "session_a.json")["stats"]["goals"], 3)
+
+    def test_stale_copy_does_not_overwrite_a_newer_remote_edit(self):
+        write_session(os.path.join(self.laptop_dir, "t"), "session_a.json", make_session("2025-07-01"))
+        self.run_sync([
+            lambda port: self.client("laptop", self.laptop_dir, port).sync(),
+            lambda port: self.client("phone", self.phone_dir, port).sync(["t"]),
+        ])
+
+        time.sleep(0.01)
+        write_session(os.path.join(self.laptop_dir, "t"), "session_a.json", make_session("2025-07-01", goals=2))
+        os.utime(os.path.join(self.phone_dir, "t", "session_a.json"))  # e.g. rewritten by a local tool, same content
+        results = self.run_sync([
+            lambda port: self.client("laptop", self.laptop_dir, port).sync(),
+            lambda port: self.client("phone", self.phone_dir, port).sync(["t"]),
+        ])
+        self.assertEqual(results, [(1, 0), (0, 1)])
+        self.assertEqual(read_session(os.path.join(self.phone_dir, "t"), "session_a.json")["stats"]["goals"], 2)
+
+    def test_details_edit_is_exchanged_but_a_touched_file_is_not(self):
+        laptop_t = os.path.join(self.laptop_dir, "t")
+        write_session(laptop_t, "session_a.json", make_session("2025-07-01"))
+        self.run_sync([
+            lambda port: self.client("laptop", self.laptop_dir, port).sync(),
+            lambda port: self.client("phone", self.phone_dir, port).sync(["t"]),
+        ])
+
+        time.sleep(0.01)
+        os.utime(os.path.join(laptop_t, "session_a.json"))  # newer mtime, same content
+        self.assertEqual(self.run_sync([lambda port: self.client("laptop", self.laptop_dir, port).sync()]), [(0, 0)])
+
+        edited = make_session("2025-07-01")
+        edited["session_info"]["note"] = "wet pitch"  # not part of the content hash
+        write_session(laptop_t, "session_a.json", edited)
+        results = self.run_sync([
+            lambda port: self.client("laptop", self.laptop_dir, port).sync(),
+            lambda port: self.client("phone", self.phone_dir, port).sync(["t"]),
+        ])
+        self.assertEqual(results, [(1, 0), (0, 1)])
+        self.assertEqual(read_session(os.path.join(self.phone_dir, "t"), "session_a.json")["session_info"]["note"], "wet pitch")
+
+    def test_same_match_saved_on_two_devices_is_not_exchanged(self):
+        laptop_copy = make_session("2025-07-01")
+        phone_copy = make_session("2025-07-01")
+        laptop_copy["session_info"]["session_id"], phone_copy["session_info"]["session_id"] = "a" * 32, "b" * 32
+        write_session(os.path.join(self.laptop_dir, "t"), "session_a.json", laptop_copy)
+        write_session(os.path.join(self.phone_dir, "t"), "session_a_bbbbbbbb.json", phone_copy)
+
+        results = self.run_sync([
+            lambda port: self.client("laptop", self.laptop_dir, port).sync(["t"]),
+            lambda port: self.client("phone", self.phone_dir, port).sync(["t"]),
+        ])
+        self.assertEqual(results, [(1, 0), (0, 0)])
+        self.assertEqual(os.listdir(os.path.join(self.phone_dir, "t")), ["session_a_bbbbbbbb.json"])
+
+    def test_update_to_a_sealed_session_stays_in_the_archive(self):
+        write_session(os.path.join(self.laptop_dir, "t"), "session_a.json", make_session("2025-07-01"))
+        self.run_sync([
+            lambda port: self.client("laptop", self.laptop_dir, port).sync(),
+            lambda port: self.client("phone", self.phone_dir, port).sync(["t"]),
+        ])
+        seal_season("t", "2025-01-01", "2025-12-31", base_dir=self.phone_dir)
+
+        time.sleep(0.01)
+        write_session(os.path.join(self.laptop_dir, "t"), "session_a.json", make_session("2025-07-01", goals=2))
+        self.run_sync([
+            lambda port: self.client("laptop", self.laptop_dir, port).sync(),
+            lambda port: self.client("phone", self.phone_dir, port).sync(["t"]),
+        ])
+        [path] = list_session_files("t", self.phone_dir)
+        self.assertTrue(path.endswith(os.path.join(".fdarc", "session_a.json")))
+        self.assertEqual(load_session(path)["stats"]["goals"], 2)
+
+    def test_rejected_uploads_are_not_counted(self):
+        laptop_t = os.path.join(self.laptop_dir, "t")
+        write_session(laptop_t, "session_a.json", make_session("2025-07-01"))
+        bad = make_session("yesterday")
+
+        # Hand the client a session the server's import check refuses
+        async def push(port):
+            client = self.client("laptop", self.laptop_dir, port)
+            original = client._changed_local_sessions
+            def changed(username, since):
+                sessions = original(username, since)
+                sessions["session_b.json"] = bad
+                return sessions
+            client._changed_local_sessions = changed
+            return await client.sync()
+
+        [(uploaded, _)] = self.run_sync([push])
+        self.assertEqual(uploaded, 1)
+        self.assertFalse(os.path.exists(os.path.join(self.server_dir, "t", "session_b.json")))
+
+    def test_push_watermark_is_per_user(self):
+        write_session(os.path.join(self.laptop_dir, "t"), "session_a.json", make_session("2025-07-01"))
+        self.run_sync([lambda port: self.client("laptop", self.laptop_dir, port).sync(["t"])])
+
+        # u was never synced, so its older file must still be pushed
+        u_folder = os.path.join(self.laptop_dir, "u")
+        write_session(u_folder, "session_b.json", make_session("2025-07-02"))
+        old = time.time() - 3600
+        os.utime(os.path.join(u_folder, "session_b.json"), (old, old))
+        [(uploaded, _)] = self.run_sync([lambda port: self.client("laptop", self.laptop_dir, port).sync(["t", "u"])])
+        self.assertEqual(uploaded, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
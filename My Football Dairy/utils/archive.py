@@ -0,0 +1,151 @@
+# utils/archive.py
+#
+# Sealed season archives: one file per user and date range holding many
+# sessions, each compressed as its own zlib frame, followed by an offset index.
+#
+#   python -m utils.archive --user t --from 2024-08-01 --to 2025-05-31
+#
+# Layout:  MAGIC | frame | frame | ... | index frame | <index offset: u64> MAGIC
+# Reading one session is a seek to its offset and one frame decompress.
+#
+# Archived sessions show up in utils.helpers.list_session_files() as
+# "<archive path>/<session name>" so loaders treat them like loose files.
+import argparse
+import json
+import os
+import struct
+import threading
+import zlib
+
+MAGIC = b"FDARC1\n"
+ARCHIVE_EXT = ".fdarc"
+_FOOTER = struct.Struct(">Q")
+COMPRESSION_LEVEL = 9
+
+
+def split_member_path(path):
+    """(archive path, session name) for a path inside an archive, else None."""
+    archive_path, _, name = path.rpartition(os.sep)
+    if archive_path.endswith(ARCHIVE_EXT):
+        return archive_path, name
+    return None
+
+
+def write_archive(path, sessions):
+    """Writes {session name: data} atomically."""
+    tmp_path = path + ".tmp"
+    index = {}
+    with open(tmp_path, "wb") as f:
+        f.write(MAGIC)
+        for name in sorted(sessions):
+            frame = zlib.compress(json.dumps(sessions[name], separators=(",", ":")).encode(), COMPRESSION_LEVEL)
+            index[name] = [f.tell(), len(frame)]
+            f.write(frame)
+        index_offset = f.tell()
+        f.write(zlib.compress(json.dumps(index).encode()))
+        f.write(_FOOTER.pack(index_offset) + MAGIC)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+class ArchiveReader:
+    def __init__(self, path):
+        self.path = path
+        self.mtime = os.path.getmtime(path)
+        with open(path, "rb") as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"{path} is not a session archive")
+            f.seek(-(_FOOTER.size + len(MAGIC)), os.SEEK_END)
+            footer = f.read(_FOOTER.size)
+            (index_offset,) = _FOOTER.unpack(footer)
+            index_end = f.tell() - _FOOTER.size
+            f.seek(index_offset)
+            self.index = json.loads(zlib.decompress(f.read(index_end - index_offset)))
+
+    def names(self):
+        return sorted(self.index)
+
+    def frame_size(self, name):
+        return self.index[name][1]
+
+    def read(self, name):
+        offset, length = self.index[name]
+        with open(self.path, "rb") as f:
+            f.seek(offset)
+            return json.loads(zlib.decompress(f.read(length)))
+
+    def read_all(self):
+        return {name: self.read(name) for name in self.index}
+
+
+def replace_member(archive_path, name, data):
+    """Re-seals the archive with one session's content replaced."""
+    sessions = open_archive(archive_path).read_all()
+    sessions[name] = data
+    write_archive(archive_path, sessions)
+
+
+_readers = {}
+_readers_lock = threading.Lock()
+
+
+def open_archive(path):
+    """Returns a cached ArchiveReader, re-opened if the archive changed on disk."""
+    mtime = os.path.getmtime(path)
+    with _readers_lock:
+        reader = _readers.get(path)
+        if reader is None or reader.mtime != mtime:
+            reader = _readers[path] = ArchiveReader(path)
+        return reader
+
+
+def seal_season(username, start_date, end_date, base_dir=None):
+    """
+    Moves the user's loose sessions dated start_date..end_date (inclusive ISO
+    dates) into season_<start>_<end>.fdarc. Returns (sessions sealed, bytes before, bytes after).
+    """
+    from utils.helpers import MATCH_BASE_DIR, load_session
+    folder = os.path.join(base_dir or MATCH_BASE_DIR, username)
+    archive_path = os.path.join(folder, f"season_{start_date}_{end_date}{ARCHIVE_EXT}")
+
+    sessions, loose_paths, bytes_before = {}, [], 0
+    if os.path.exists(archive_path):
+        sessions = open_archive(archive_path).read_all()
+        bytes_before += os.path.getsize(archive_path)
+    for name in sorted(os.listdir(folder)):
+        path = os.path.join(folder, name)
+        if not name.endswith(".json"):
+            continue
+        data = load_session(path)
+        date = ((data or {}).get("session_info") or {}).get("date", "")
+        if data is not None and start_date <= date <= end_date:
+            sessions[name] = data
+            loose_paths.append(path)
+            bytes_before += os.path.getsize(path)
+    if not loose_paths:
+        return 0, 0, 0
+
+    write_archive(archive_path, sessions)
+    from utils.session_patches import discard_patches
+    for path in loose_paths:
+        os.remove(path)
+        discard_patches(path)  # already folded in: load_session() applied them
+    return len(loose_paths), bytes_before, os.path.getsize(archive_path)
+
+
+def main():
+    from utils.helpers import list_usernames
+    parser = argparse.ArgumentParser(description="Seal a date range of sessions into compressed archives")
+    parser.add_argument("--user", action="append", help="repeatable; default: every user")
+    parser.add_argument("--from", dest="start_date", required=True, help="YYYY-MM-DD")
+    parser.add_argument("--to", dest="end_date", required=True, help="YYYY-MM-DD")
+    args = parser.parse_args()
+    for username in args.user or list_usernames():
+        count, before, after = seal_season(username, args.start_date, args.end_date)
+        if count:
+            print(f"{username}: sealed {count} sessions, {before} -> {after} bytes")
+
+
+if __name__ == "__main__":
+    main()
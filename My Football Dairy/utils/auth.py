@@ -0,0 +1,141 @@
+# utils/auth.py
+#
+# Password hashing and the user store behind LoginScreen/RegisterScreen.
+# Everything here runs on a worker thread via run_in_worker(), results are
+# handed back to the Kivy thread through Clock.
+import hashlib
+import hmac
+import json
+import os
+import secrets
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from kivy.clock import Clock
+
+from utils.helpers import MATCH_BASE_DIR, USERS_JSON_PATH
+
+# Raise this to make hashes more expensive; older hashes are upgraded on the next login
+PBKDF2_ITERATIONS = 240_000
+HASH_SCHEME = "pbkdf2_sha256"
+
+_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="auth")
+
+
+def run_in_worker(fn, callback, *args):
+    """Runs fn(*args) on the auth pool and calls callback(result, error) on the Kivy thread."""
+    def done(future):
+        error = future.exception()
+        result = None if error else future.result()
+        Clock.schedule_once(lambda dt: callback(result, error))
+    _executor.submit(fn, *args).add_done_callback(done)
+
+
+def hash_password(password, iterations=PBKDF2_ITERATIONS):
+    salt = secrets.token_hex(16)
+    digest = hashlib.pbkdf2_hmac("sha256", password.encode(), bytes.fromhex(salt), iterations).hex()
+    return f"{HASH_SCHEME}${iterations}${salt}${digest}"
+
+
+def verify_password(password, stored):
+    if stored.startswith(HASH_SCHEME + "$"):
+        _, iterations, salt, digest = stored.split("$")
+        candidate = hashlib.pbkdf2_hmac("sha256", password.encode(), bytes.fromhex(salt), int(iterations)).hex()
+        return hmac.compare_digest(candidate, digest)
+    # Accounts registered before PBKDF2: unsalted sha256
+    return hmac.compare_digest(hashlib.sha256(password.encode()).hexdigest(), stored)
+
+
+def needs_rehash(stored):
+    if not stored.startswith(HASH_SCHEME + "$"):
+        return True
+    return int(stored.split("$")[1]) < PBKDF2_ITERATIONS
+
+
+class UserStore:
+    """
+    users.json indexed by email and username. The file is only re-parsed when
+    its mtime changes, so a login is a dict lookup plus one hash regardless of
+    how many users are registered.
+    """
+    def __init__(self, path=USERS_JSON_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._mtime = None
+        self.users = []
+        self.by_email = {}
+        self.usernames = set()
+
+    def _refresh(self):
+        try:
+            mtime = os.path.getmtime(self.path)
+        except OSError:
+            mtime = None
+        if mtime == self._mtime:
+            return
+        users = []
+        if mtime is not None:
+            try:
+                with open(self.path, "r") as f:
+                    users = json.load(f)
+            except json.JSONDecodeError:
+                users = []
+        self._set_users(users, mtime)
+
+    def _set_users(self, users, mtime):
+        self.users = users
+        self.by_email = {}
+        for u in users:
+            self.by_email.setdefault(u.get("email"), u)  # duplicate emails: the first account logs in, as before
+        self.usernames = {u.get("username") for u in users}
+        self._mtime = mtime
+
+    def _save(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.users, f, indent=4)
+        os.replace(tmp_path, self.path)
+        self._mtime = os.path.getmtime(self.path)
+
+    def authenticate(self, email, password):
+        """Returns (status, username); status is 'ok', 'no_users', 'not_found' or 'bad_password'."""
+        with self._lock:
+            self._refresh()
+            if not self.users:
+                return "no_users", None
+            user = self.by_email.get(email)
+        if user is None:
+            return "not_found", None
+        if not verify_password(password, user.get("password", "")):
+            return "bad_password", None
+
+        if needs_rehash(user["password"]):
+            old_hash, new_hash = user["password"], hash_password(password)
+            with self._lock:
+                # users.json may have been reloaded since the lookup: update the current entry
+                self._refresh()
+                current = self.by_email.get(email)
+                if current is not None and current.get("password") == old_hash:
+                    current["password"] = new_hash
+                    self._save()
+                    self._set_users(self.users, self._mtime)
+        os.makedirs(os.path.join(MATCH_BASE_DIR, user["username"]), exist_ok=True)
+        return "ok", user["username"]
+
+    def register(self, username, email, password):
+        """Returns 'ok' or 'username_taken'."""
+        hashed_password = hash_password(password)
+        with self._lock:
+            self._refresh()
+            if username in self.usernames:
+                return "username_taken"
+            # Create match history folder for this user
+            os.makedirs(os.path.join(MATCH_BASE_DIR, username), exist_ok=True)
+            self.users.append({"username": username, "email": email, "password": hashed_password})
+            self._set_users(self.users, self._mtime)
+            self._save()
+        return "ok"
+
+
+user_store = UserStore()
@@ -0,0 +1,122 @@
+# utils/dedup.py
+#
+# Per-user index of session content hashes (models.match_model.session_content_hash)
+# so saves, imports and syncs can spot an exact duplicate with one dict lookup.
+#
+#   python -m utils.dedup    # list duplicate groups already on disk
+import json
+import os
+import threading
+
+from models.match_model import session_content_hash
+from utils.helpers import MATCH_BASE_DIR, list_session_files, list_usernames, load_session, session_mtime
+
+HASH_INDEX_DIR = os.path.join("data", "cache", "hash_index")
+
+
+class HashIndex:
+    def __init__(self, username, base_dir=MATCH_BASE_DIR, index_dir=HASH_INDEX_DIR):
+        self.username = username
+        self.base_dir = base_dir
+        self.folder = os.path.join(base_dir, username)
+        self.index_dir = index_dir
+        self.path = os.path.join(index_dir, f"{username}.json")
+        self.files = {}   # session path relative to the user folder -> [mtime, hash]
+        self.by_hash = {}  # hash -> first session path holding it
+        self._lock = threading.Lock()
+
+    def load(self, should_stop=None):
+        try:
+            with open(self.path, "r") as f:
+                self.files = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            self.files = {}
+        self.refresh(should_stop)
+        return self
+
+    def refresh(self, should_stop=None):
+        """
+        Hashes only files that are new or changed since the index was written.
+        Returns False if should_stop() cut it short; what was hashed is kept.
+        """
+        with self._lock:
+            current = {os.path.relpath(p, self.folder): session_mtime(p) for p in list_session_files(self.username, self.base_dir)}
+            changed, complete = False, True
+            for name in list(self.files):
+                if name not in current:
+                    del self.files[name]
+                    changed = True
+            for name, mtime in current.items():
+                entry = self.files.get(name)
+                if entry is None or entry[0] != mtime:
+                    if should_stop is not None and should_stop():
+                        complete = False
+                        break
+                    data = load_session(os.path.join(self.folder, name))
+                    if data is not None:
+                        self.files[name] = [mtime, session_content_hash(data)]
+                        changed = True
+            self._rebuild_by_hash()
+            if changed:
+                self._save()
+            return complete
+
+    def _rebuild_by_hash(self):
+        self.by_hash = {}
+        for name in sorted(self.files):
+            self.by_hash.setdefault(self.files[name][1], name)
+
+    def _save(self):
+        os.makedirs(self.index_dir, exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.files, f)
+        os.replace(tmp_path, self.path)
+
+    def find(self, content_hash):
+        """Name of the session already holding this content, or None."""
+        return self.by_hash.get(content_hash)
+
+    def is_duplicate(self, name):
+        """True if `name` holds content that an earlier session already has."""
+        entry = self.files.get(name)
+        return entry is not None and self.by_hash.get(entry[1]) != name
+
+    def add(self, name, content_hash):
+        path = os.path.join(self.folder, name)
+        with self._lock:
+            old = self.files.get(name)
+            self.files[name] = [session_mtime(path), content_hash]
+            if old and old[1] != content_hash and self.by_hash.get(old[1]) == name:
+                self._rebuild_by_hash()  # an edited session gives up its old hash
+            else:
+                self.by_hash.setdefault(content_hash, name)
+            self._save()
+
+    def duplicate_groups(self):
+        groups = {}
+        for name, (_, digest) in self.files.items():
+            groups.setdefault(digest, []).append(name)
+        return [sorted(names) for names in groups.values() if len(names) > 1]
+
+
+_indexes = {}
+_indexes_lock = threading.Lock()  # the post-login prefetcher builds indexes from a worker thread
+
+
+def get_hash_index(username, should_stop=None):
+    with _indexes_lock:
+        index = _indexes.get(username)
+        if index is None:
+            index = _indexes[username] = HashIndex(username).load(should_stop)
+    return index
+
+
+def main():
+    for username in list_usernames():
+        for names in HashIndex(username).load().duplicate_groups():
+            print(f"{username}: {', '.join(names)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+# utils/downsample.py
+#
+# Largest-Triangle-Three-Buckets downsampling for the history charts, plus a
+# pyramid of pre-downsampled levels so zooming and panning only ever slice
+# a precomputed level, never downsample the whole history per frame.
+import numpy as np
+
+
+def lttb(x, y, threshold):
+    """
+    Picks `threshold` of the (x, y) points that keep the visual shape of the
+    line: per bucket, the point forming the largest triangle with the last
+    kept point and the next bucket's average. Returns (x, y) arrays.
+    """
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return x, y
+    every = (n - 2) / (threshold - 2)
+    sampled = np.empty(threshold, dtype=int)
+    sampled[0], sampled[-1] = 0, n - 1
+    a = 0
+    for i in range(threshold - 2):
+        start, end = int(i * every) + 1, int((i + 1) * every) + 1
+        next_end = min(int((i + 2) * every) + 1, n)
+        avg_x, avg_y = x[end:next_end].mean(), y[end:next_end].mean()
+        area = np.abs((x[a] - avg_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (avg_y - y[a]))
+        a = start + int(np.argmax(area))
+        sampled[i + 1] = a
+    return x[sampled], y[sampled]
+
+
+class SeriesPyramid:
+    """
+    One series at several resolutions: level 0 is the raw data and each level
+    above holds half the points of the one below, downsampled from it with
+    LTTB. Levels are built on first use.
+    """
+    def __init__(self, y, x=None):
+        y = np.asarray(y, dtype=float)
+        x = np.arange(len(y), dtype=float) if x is None else np.asarray(x, dtype=float)
+        self.levels = [(x, y)]
+
+    def __len__(self):
+        return len(self.levels[0][0])
+
+    def _level(self, k):
+        while len(self.levels) <= k:
+            x, y = self.levels[-1]
+            self.levels.append(lttb(x, y, max(len(x) // 2, 3)))
+        return self.levels[k]
+
+    def query(self, x_min, x_max, pixels):
+        """
+        At most `pixels` points covering [x_min, x_max], plus one either side so
+        lines reach the edges: a slice of the finest level that fits, which is
+        already LTTB-downsampled, so a redraw does no downsampling of its own.
+        """
+        pixels = max(int(pixels), 3)
+        k = 0
+        while True:
+            x, y = self._level(k)
+            in_window = np.searchsorted(x, x_max, side='right') - np.searchsorted(x, x_min)
+            if in_window <= pixels or len(x) <= 3:
+                break
+            k += 1
+        lo = max(int(np.searchsorted(x, x_min)) - 1, 0)
+        hi = min(int(np.searchsorted(x, x_max, side='right')) + 1, len(x))
+        return x[lo:hi], y[lo:hi]
@@ -0,0 +1,138 @@
+# utils/draft_journal.py
+import json
+import os
+
+DRAFTS_DIR = os.path.join("data", "drafts")
+COMPACT_EVERY = 200  # journal records folded into the snapshot once this many pile up
+
+
+def apply_draft_record(markers, record):
+    """Applies one journal record to a list of marker dicts (in place)."""
+    op = record.get("op")
+    if op == "add":
+        markers.append(dict(record["marker"]))
+    elif op == "end":
+        if markers:
+            markers[-1]["rel_end_pos"] = record.get("rel_end_pos")
+    elif op == "undo":
+        if markers:
+            markers.pop()
+    elif op == "clear":
+        markers.clear()
+
+
+class DraftJournal:
+    """
+    Crash-proof journal of the live session on AddStatScreen.
+
+    Every marker add, undo, end-position update and clear is appended as one
+    JSON line. Appends only touch an in-memory buffer; flush() writes and
+    fsyncs it and is driven by a Clock interval, not by each tap.
+
+    Every COMPACT_EVERY records the current markers are written to a snapshot
+    and a new journal generation is started, so restore() never replays more
+    than COMPACT_EVERY records however long the session runs.
+    """
+    def __init__(self, username):
+        self.folder = os.path.join(DRAFTS_DIR, username)
+        self.snapshot_path = os.path.join(self.folder, "snapshot.json")
+        self.generation = 0
+        self.markers = []  # mirror of the journalled state, used for snapshots
+        self.buffer = []
+        self.records_in_generation = 0
+        self._file = None
+
+    def _journal_path(self, generation):
+        return os.path.join(self.folder, f"journal_{generation}.jsonl")
+
+    def restore(self):
+        """Rebuilds the draft from snapshot + journal. Returns the markers list."""
+        self.generation, self.markers = 0, []
+        if os.path.exists(self.snapshot_path):
+            try:
+                with open(self.snapshot_path, "r") as f:
+                    snapshot = json.load(f)
+                self.generation = snapshot.get("generation", 0)
+                self.markers = snapshot.get("markers", [])
+            except (json.JSONDecodeError, OSError):
+                pass
+
+        self.records_in_generation = 0
+        journal_path = self._journal_path(self.generation)
+        if os.path.exists(journal_path):
+            good_end = 0
+            with open(journal_path, "rb") as f:
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        break  # torn final write from a crash
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        break
+                    apply_draft_record(self.markers, record)
+                    self.records_in_generation += 1
+                    good_end += len(line)
+            # Cut the torn tail off, or later appends would land after it and never be replayed
+            if good_end < os.path.getsize(journal_path):
+                with open(journal_path, "r+b") as f:
+                    f.truncate(good_end)
+        return [dict(m) for m in self.markers]
+
+    def append(self, record):
+        apply_draft_record(self.markers, record)
+        self.buffer.append(json.dumps(record))
+        self.records_in_generation += 1
+
+    def flush(self, *args):
+        if not self.buffer:
+            return
+        if self._file is None:
+            os.makedirs(self.folder, exist_ok=True)
+            self._file = open(self._journal_path(self.generation), "a")
+        self._file.write("\n".join(self.buffer) + "\n")
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self.buffer = []
+        if self.records_in_generation >= COMPACT_EVERY:
+            self._compact()
+
+    def _compact(self):
+        old_path = self._journal_path(self.generation)
+        tmp_path = self.snapshot_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"generation": self.generation + 1, "markers": self.markers}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.snapshot_path)
+
+        self.close()
+        self.generation += 1
+        self.records_in_generation = 0
+        try:
+            os.remove(old_path)
+        except OSError:
+            pass
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def reset(self, markers=()):
+        """Starts the draft over holding `markers`, e.g. what stays on the pitch after a save."""
+        self.discard()
+        for marker in markers:
+            self.append({"op": "add", "marker": dict(marker)})
+        self.flush()
+
+    def discard(self):
+        """Drops the draft, e.g. once the session has been saved for real."""
+        self.close()
+        self.buffer, self.markers = [], []
+        self.generation, self.records_in_generation = 0, 0
+        if os.path.isdir(self.folder):
+            for name in os.listdir(self.folder):
+                try:
+                    os.remove(os.path.join(self.folder, name))
+                except OSError:
+                    pass
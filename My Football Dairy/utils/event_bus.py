@@ -0,0 +1,48 @@
+# utils/event_bus.py
+#
+# Publish/subscribe between the pitch widgets and AddStatScreen. Publishing
+# only queues the event; a Clock trigger delivers everything queued in a frame
+# to each subscriber as one batch, so a burst of taps costs one summary
+# rebuild (one journal append per event, one redraw) instead of one per tap.
+from kivy.clock import Clock
+
+MARKER_ADDED = 'marker_added'          # payload: {'marker': {...}}
+MARKER_UNDONE = 'marker_undone'
+END_SET = 'end_set'                    # payload: {'rel_end_pos': (x, y)}
+CLEARED = 'cleared'
+MARKER_CHANGED = 'marker_changed'      # editing a saved session: marker moved or retyped
+POSITION_SELECTED = 'position_selected'  # payload: {'position': name or None}
+
+MARKER_TOPICS = (MARKER_ADDED, MARKER_UNDONE, END_SET, CLEARED, MARKER_CHANGED)
+
+
+class EventBus:
+    def __init__(self):
+        self._subscribers = []  # (frozenset of topics, callback)
+        self._pending = []      # (topic, payload) in publish order
+        self._trigger = Clock.create_trigger(self._dispatch)
+
+    def subscribe(self, topics, callback):
+        """callback(batch) receives a list of (topic, payload) once per frame with anything pending."""
+        self._subscribers.append((frozenset(topics), callback))
+
+    def unsubscribe(self, callback):
+        self._subscribers = [(topics, cb) for topics, cb in self._subscribers if cb != callback]
+
+    def publish(self, topic, payload=None):
+        self._pending.append((topic, payload or {}))
+        self._trigger()
+
+    def flush(self):
+        """Delivers pending events now, e.g. before the app is paused."""
+        self._trigger.cancel()
+        self._dispatch()
+
+    def _dispatch(self, *args):
+        events, self._pending = self._pending, []
+        if not events:
+            return
+        for topics, callback in list(self._subscribers):
+            batch = [event for event in events if event[0] in topics]
+            if batch:
+                callback(batch)
@@ -0,0 +1,175 @@
+# utils/export.py
+#
+# Flattens every user's matches_history into two tables for analysis:
+#   sessions - one row per session (session_info + normalised stats)
+#   events   - one row per event, rel_pos/rel_end_pos split into x/y
+# session_row numbers the sessions of one export and joins the two tables;
+# session_id and xg_model_version come from session_info (blank for old sessions).
+#
+#   python -m utils.export --out exports --format csv npz
+#
+# Session files are parsed in a process pool and streamed to the writers in
+# chunks of --chunk-rows, so memory stays flat however large the archive is.
+# The .npz holds one array per column per chunk ("events.x.000003.npy");
+# load_npz_table() stitches the chunks back together.
+import argparse
+import csv
+import os
+import zipfile
+from multiprocessing import Pool
+
+from models.match_model import SESSION_INFO_FIELDS, STAT_FIELDS, session_stats
+from utils.helpers import MATCH_BASE_DIR, list_session_files, list_usernames, load_session
+
+SESSION_COLUMNS = ('session_row', 'username', 'session_file', 'session_id', 'xg_model_version') + SESSION_INFO_FIELDS + STAT_FIELDS
+EVENT_COLUMNS = ('session_row', 'event_index', 'type', 'x', 'y', 'end_x', 'end_y', 'xg', 'xa')
+FLOAT_COLUMNS = {'x', 'y', 'end_x', 'end_y', 'xg', 'xa', 'total_xg', 'total_xa', 'time_played', 'performance_rating'}
+INT_COLUMNS = {'session_row', 'event_index', 'goals', 'assists', 'shots_on_target', 'shots_off_target', 'total_shots'}
+CHUNK_ROWS = 100_000
+
+
+def _iter_session_paths(base_dir):
+    for username in list_usernames(base_dir):
+        for path in list_session_files(username, base_dir):
+            yield username, path
+
+
+def _flatten_session(item):
+    """Worker: parses one session file into (session row, event rows)."""
+    username, path = item
+    data = load_session(path)
+    if data is None:
+        return None
+    info = data.get("session_info") or {}
+    stats = session_stats(data)
+    row = [username, os.path.basename(path), info.get("session_id", ""), info.get("xg_model_version", "")]
+    row += [info.get(field, "") for field in SESSION_INFO_FIELDS]
+    row += [stats[field] for field in STAT_FIELDS]
+
+    event_rows = []
+    for index, event in enumerate(data.get("events") or []):
+        x, y = event.get("rel_pos") or (None, None)
+        end_x, end_y = event.get("rel_end_pos") or (None, None)
+        event_rows.append([index, event.get("type", ""), x, y, end_x, end_y, event.get("xg"), event.get("xa")])
+    return row, event_rows
+
+
+class CsvTableWriter:
+    def __init__(self, path, columns):
+        self._file = open(path, "w", newline="")
+        self._writer = csv.writer(self._file)
+        self._writer.writerow(columns)
+
+    def write_rows(self, rows):
+        self._writer.writerows(["" if v is None else v for v in row] for row in rows)
+
+    def close(self):
+        self._file.close()
+
+
+def _to_float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return float("nan")
+
+
+class NpzTableWriter:
+    """Appends column chunks of several tables into one .npz archive."""
+    def __init__(self, path):
+        import numpy as np
+        self.np = np
+        self._zip = zipfile.ZipFile(path, "w", compression=zipfile.ZIP_DEFLATED, allowZip64=True)
+        self._chunk_counts = {}
+
+    def write_rows(self, table, columns, rows):
+        if not rows:
+            return
+        chunk = self._chunk_counts.get(table, 0)
+        self._chunk_counts[table] = chunk + 1
+        for column, values in zip(columns, zip(*rows)):
+            array = self._to_array(column, values)
+            with self._zip.open(f"{table}.{column}.{chunk:06d}.npy", "w", force_zip64=True) as f:
+                self.np.lib.format.write_array(f, array, allow_pickle=False)
+
+    def _to_array(self, column, values):
+        if column in INT_COLUMNS:
+            return self.np.asarray(values, dtype=self.np.int64)
+        if column in FLOAT_COLUMNS:
+            return self.np.asarray([_to_float(v) for v in values], dtype=self.np.float64)
+        return self.np.asarray(["" if v is None else str(v) for v in values])
+
+    def close(self):
+        self._zip.close()
+
+
+def load_npz_table(path, table):
+    """Reads one table of an exported .npz back as {column: array}."""
+    import numpy as np
+    with np.load(path) as archive:
+        chunks = {}
+        for key in sorted(archive.files):
+            name, column, _ = key.split(".")
+            if name == table:
+                chunks.setdefault(column, []).append(archive[key])
+    return {column: np.concatenate(parts) for column, parts in chunks.items()}
+
+
+def export_all(out_dir, formats=("csv", "npz"), base_dir=MATCH_BASE_DIR, workers=None, chunk_rows=CHUNK_ROWS):
+    """Returns (session_count, event_count)."""
+    os.makedirs(out_dir, exist_ok=True)
+    csv_sessions = csv_events = npz = None
+    if "csv" in formats:
+        csv_sessions = CsvTableWriter(os.path.join(out_dir, "sessions.csv"), SESSION_COLUMNS)
+        csv_events = CsvTableWriter(os.path.join(out_dir, "events.csv"), EVENT_COLUMNS)
+    if "npz" in formats:
+        npz = NpzTableWriter(os.path.join(out_dir, "football_dairy.npz"))
+
+    session_buffer, event_buffer = [], []
+    session_count = event_count = 0
+
+    def flush():
+        if csv_sessions:
+            csv_sessions.write_rows(session_buffer)
+            csv_events.write_rows(event_buffer)
+        if npz:
+            npz.write_rows("sessions", SESSION_COLUMNS, session_buffer)
+            npz.write_rows("events", EVENT_COLUMNS, event_buffer)
+        session_buffer.clear()
+        event_buffer.clear()
+
+    try:
+        with Pool(workers) as pool:
+            for result in pool.imap(_flatten_session, _iter_session_paths(base_dir), chunksize=32):
+                if result is None:
+                    continue
+                row, event_rows = result
+                session_row = session_count
+                session_count += 1
+                event_count += len(event_rows)
+                session_buffer.append([session_row] + row)
+                event_buffer.extend([session_row] + event_row for event_row in event_rows)
+                if len(event_buffer) >= chunk_rows or len(session_buffer) >= chunk_rows:
+                    flush()
+        flush()
+    finally:
+        for writer in (csv_sessions, csv_events, npz):
+            if writer:
+                writer.close()
+    return session_count, event_count
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export all sessions and events to flat tables")
+    parser.add_argument("--out", default="exports")
+    parser.add_argument("--format", nargs="+", choices=["csv", "npz"], default=["csv", "npz"])
+    parser.add_argument("--root", default=MATCH_BASE_DIR)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS)
+    args = parser.parse_args()
+    sessions, events = export_all(args.out, args.format, args.root, args.workers, args.chunk_rows)
+    print(f"Exported {sessions} sessions and {events} events to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
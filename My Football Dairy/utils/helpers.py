@@ -1 +1,83 @@
-# helpers.py
\ No newline at end of file
+# utils/helpers.py
+import json
+import logging
+import os
+import zlib
+
+from utils.archive import ARCHIVE_EXT, open_archive, split_member_path
+from utils.session_patches import apply_patches, patch_mtime
+from utils.validators import validate_session
+
+logger = logging.getLogger(__name__)
+
+USERS_JSON_PATH = os.path.join("data", "registered_user", "users.json")
+MATCH_BASE_DIR = os.path.join("data", "matches_history")
+
+
+def list_usernames(base_dir=MATCH_BASE_DIR):
+    if not os.path.isdir(base_dir):
+        return []
+    return sorted(name for name in os.listdir(base_dir) if os.path.isdir(os.path.join(base_dir, name)))
+
+
+def list_session_files(username, base_dir=MATCH_BASE_DIR):
+    """Paths of a user's sessions; sessions in sealed archives appear as <archive>/<name>."""
+    folder = os.path.join(base_dir, username)
+    if not os.path.isdir(folder):
+        return []
+    paths = []
+    for name in os.listdir(folder):
+        path = os.path.join(folder, name)
+        if name.endswith(".json"):
+            paths.append(path)
+        elif name.endswith(ARCHIVE_EXT):
+            try:
+                paths.extend(os.path.join(path, member) for member in open_archive(path).names())
+            except (OSError, ValueError):
+                pass
+    return sorted(paths)
+
+
+def load_session(path, validate=True):
+    """
+    Reads a session file or archived session. With validate=True (the default)
+    legacy fields are coerced and sessions failing the schema are skipped
+    (returned as None) instead of leaking bad values into aggregates.
+    """
+    member = split_member_path(path)
+    try:
+        if member:
+            data = open_archive(member[0]).read(member[1])
+        else:
+            with open(path, "r") as f:
+                data = json.load(f)
+    except (OSError, ValueError, KeyError, zlib.error):
+        return None
+    apply_patches(path, data)  # edits made after saving (utils/session_patches.py)
+    if validate:
+        errors = validate_session(data, coerce=True)
+        if errors:
+            logger.warning("Skipping invalid session %s: %s", path, "; ".join(errors[:3]))
+            return None
+    return data
+
+
+def session_mtime(path):
+    """
+    os.path.getmtime() that also works for archived sessions (the archive's
+    mtime) and moves forward when the session is edited (its patch log's mtime).
+    """
+    member = split_member_path(path)
+    mtime = os.path.getmtime(member[0] if member else path)
+    return max(mtime, patch_mtime(path) or 0)
+
+
+def session_size(path):
+    member = split_member_path(path)
+    if member:
+        return open_archive(member[0]).frame_size(member[1])
+    return os.path.getsize(path)
+
+
+def is_archived(path):
+    return split_member_path(path) is not None
@@ -0,0 +1,98 @@
+# utils/pitch_geometry.py
+#
+# Half-pitch markings and marker styling shared by HalfPitchWidget (Kivy
+# canvas) and the headless shot-map renderer (utils/shot_map_report.py).
+# Coordinates are y-up with the goal line at the bottom edge of the pitch;
+# `unit` is the size of one dp on the target surface.
+import math
+
+HALF_PITCH_ASPECT = 68 / 52.5
+GRASS_COLORS = ((0.13, 0.55, 0.13, 1), (0.14, 0.58, 0.14, 1))
+GRASS_STRIPES = 9
+LINE_COLOR = (0.9, 0.9, 0.9, 0.9)
+LINE_WIDTH = 1.5       # dp
+DIRECTION_COLOR = (1, 1, 1, 0.7)
+DIRECTION_WIDTH = 1.2  # dp
+ARC_SEGMENTS = 20
+
+# marker type -> (RGBA, size in dp)
+MARKER_STYLES = {
+    'goal': ((1, 0.84, 0, 1), 19),
+    'shot_on': ((0.2, 0.8, 0.2, 1), 10),
+    'shot_off': ((0.9, 0.1, 0.1, 1), 10),
+    'assist': ((0.1, 0.7, 1, 1), 10),
+}
+SHOT_OFF_STROKE = 2  # dp
+
+
+def fit_half_pitch(x, y, width, height):
+    """Largest half pitch (x, y, w, h) centred in the given box."""
+    if width / height > HALF_PITCH_ASPECT:
+        h = height; w = height * HALF_PITCH_ASPECT
+    else:
+        w = width; h = width / HALF_PITCH_ASPECT
+    return x + (width - w) / 2, y + (height - h) / 2, w, h
+
+
+def grass_stripes(x, y, w, h):
+    """(color, (x, y, w, h)) for each grass stripe, bottom to top."""
+    stripe_h = h / GRASS_STRIPES
+    return [(GRASS_COLORS[i % 2], (x, y + i * stripe_h, w, stripe_h)) for i in range(GRASS_STRIPES)]
+
+
+def _arc(cx, cy, radius, start, end):
+    points = []
+    for i in range(ARC_SEGMENTS + 1):
+        angle = start + (end - start) * i / ARC_SEGMENTS
+        points.extend([cx + radius * math.cos(angle), cy + radius * math.sin(angle)])
+    return points
+
+
+def half_pitch_markings(x, y, w, h, unit=1.0):
+    """
+    Pitch lines as (polylines, dots): polylines are flat [x0, y0, x1, y1, ...]
+    lists, dots are (cx, cy, radius). Dimensions follow a 68 x 52.5 m half.
+    """
+    center_x = x + w / 2
+    polylines = [[x, y, x + w, y], [x, y, x, y + h], [x + w, y, x + w, y + h], [x, y + h, x + w, y + h]]
+    dots = []
+
+    # Center circle arc and spot on the halfway line
+    center_circle_radius = w * (9.15 / 68.0)
+    polylines.append(_arc(center_x, y + h, center_circle_radius, math.pi, 2 * math.pi))
+    dots.append((center_x, y + h, 2 * unit))
+
+    goal_width = w * (7.32 / 68.0); goal_depth = 8 * unit
+    goal_x1, goal_x2 = center_x - goal_width / 2, center_x + goal_width / 2
+    polylines += [[goal_x1, y, goal_x1, y - goal_depth], [goal_x2, y, goal_x2, y - goal_depth], [goal_x1, y - goal_depth, goal_x2, y - goal_depth]]
+
+    for depth, width in ((16.5, 40.32), (5.5, 18.32)):  # penalty area, goal area
+        box_y = y + h * (depth / 52.5)
+        box_x1, box_x2 = center_x - w * (width / 68.0) / 2, center_x + w * (width / 68.0) / 2
+        polylines += [[box_x1, y, box_x1, box_y], [box_x2, y, box_x2, box_y], [box_x1, box_y, box_x2, box_y]]
+
+    # Penalty spot and arc
+    penalty_spot_y = y + h * (11.0 / 52.5)
+    dots.append((center_x, penalty_spot_y, 2.5 * unit))
+    polylines.append(_arc(center_x, penalty_spot_y, w * (9.15 / 68.0), math.radians(35), math.radians(145)))
+    return polylines, dots
+
+
+def star_points(cx, cy, outer_radius):
+    """Flat list of the 10 corners of the goal marker's five-pointed star."""
+    inner_radius = outer_radius * 0.4
+    points = []
+    for i in range(10):
+        radius = outer_radius if i % 2 == 0 else inner_radius
+        angle = math.pi / 2 + (2 * math.pi / 10) * i
+        points.extend([cx + radius * math.cos(angle), cy + radius * math.sin(angle)])
+    return points
+
+
+def arrow_head(start, end, unit=1.0):
+    """Triangle [x0, y0, x1, y1, x2, y2] for the arrow tip of a shot/pass direction."""
+    angle = math.atan2(end[1] - start[1], end[0] - start[0])
+    arrow_len, arrow_angle = 8 * unit, math.pi / 6
+    p1 = (end[0] - arrow_len * math.cos(angle - arrow_angle), end[1] - arrow_len * math.sin(angle - arrow_angle))
+    p2 = (end[0] - arrow_len * math.cos(angle + arrow_angle), end[1] - arrow_len * math.sin(angle + arrow_angle))
+    return [end[0], end[1], p1[0], p1[1], p2[0], p2[1]]
@@ -0,0 +1,96 @@
+# utils/prefetch.py
+#
+# Warms a user's caches in the background right after login so the first
+# open of the stats view is served from memory. Started by LoginScreen and
+# cancelled by HomeScreen.logout.
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from models.player_model import get_player_history
+from models.xg_model import load_scored_session
+from utils.helpers import MATCH_BASE_DIR, session_mtime, session_size
+from utils.search_index import get_search_index
+
+RECENT_SESSIONS = 20
+PREFETCH_TIME_BUDGET = 3.0          # seconds
+SESSION_CACHE_MAX_BYTES = 8 * 1024 * 1024
+
+
+class SessionCache:
+    """LRU of loaded sessions, bounded by the on-disk size of the files it holds."""
+    def __init__(self, max_bytes=SESSION_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self._entries = OrderedDict()  # path -> (mtime, size, data)
+        self._lock = threading.Lock()
+
+    def get(self, path):
+        """Returns the (re-scored) session at path, loading it on a miss."""
+        try:
+            mtime, size = session_mtime(path), session_size(path)
+        except (OSError, ValueError, KeyError):
+            return None
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry and entry[0] == mtime:
+                self._entries.move_to_end(path)
+                return entry[2]
+        data = load_scored_session(path)
+        if data is not None:
+            self.put(path, mtime, size, data)
+        return data
+
+    def put(self, path, mtime, size, data):
+        with self._lock:
+            old = self._entries.pop(path, None)
+            if old:
+                self.total_bytes -= old[1]
+            if size > self.max_bytes:
+                return
+            self._entries[path] = (mtime, size, data)
+            self.total_bytes += size
+            while self.total_bytes > self.max_bytes:
+                _, (_, evicted_size, _) = self._entries.popitem(last=False)
+                self.total_bytes -= evicted_size
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.total_bytes = 0
+
+
+session_cache = SessionCache()
+
+
+class Prefetcher(threading.Thread):
+    def __init__(self, username, recent=RECENT_SESSIONS, time_budget=PREFETCH_TIME_BUDGET):
+        super().__init__(name=f"prefetch-{username}", daemon=True)
+        self.username = username
+        self.recent = recent
+        self.deadline = time.monotonic() + time_budget
+        self._cancelled = threading.Event()
+
+    def cancel(self):
+        self._cancelled.set()
+
+    def _should_stop(self):
+        return self._cancelled.is_set() or time.monotonic() > self.deadline
+
+    def run(self):
+        # Manifest + aggregates first: that's what the stats view needs. A cold
+        # history is built only as far as the budget allows; PlayerScreen finishes it
+        history = get_player_history(self.username, self._should_stop)
+        get_search_index(self.username, self._should_stop)
+        folder = os.path.join(MATCH_BASE_DIR, self.username)
+        for name in reversed(history.names[-self.recent:]):
+            if self._should_stop():
+                return
+            session_cache.get(os.path.join(folder, name))
+
+
+def start_prefetch(username):
+    prefetcher = Prefetcher(username)
+    prefetcher.start()
+    return prefetcher
@@ -0,0 +1,241 @@
+# utils/search_index.py
+#
+# Per-user inverted index over the searchable session_info fields and the
+# words of the note, so finding "mezzala 3-5-2 wet pitch" is a few set
+# intersections instead of opening every session file.
+#
+#   python -m utils.search_index --user t "role:mezzala formation:3-5-2 wet"
+#   python -m utils.search_index --user t "from:2025-07-01 to:2025-07-31 match"
+#
+# Every query word is a prefix match ("mezz" finds Mezzala). "field:word"
+# only matches in that field; from:/to: restrict the date range (inclusive).
+import argparse
+import bisect
+import heapq
+import json
+import os
+import re
+import threading
+import time
+
+from utils.helpers import MATCH_BASE_DIR, list_session_files, load_session, session_mtime
+from utils.session_patches import PATCHES_DIR
+
+SEARCH_INDEX_DIR = os.path.join("data", "cache", "search_index")
+INDEX_VERSION = 2  # bump when tokenize() or session_terms() change
+SEARCH_FIELDS = ('game_type', 'formation', 'position', 'role', 'date', 'note')
+_MAX_CHAR = "\uffff"  # sorts after any term or date
+_TOKEN_RE = re.compile(r"[^\W_]+(?:[-.][^\W_]+)*")  # any letters or digits ("müller"); keeps "3-5-2" and dates whole
+
+
+def tokenize(text):
+    return _TOKEN_RE.findall(str(text).lower())
+
+
+def session_terms(data):
+    """Bare and field-qualified terms ("mezzala", "role:mezzala") for one session."""
+    info = data.get("session_info") or {}
+    terms = set()
+    for field in SEARCH_FIELDS:
+        for token in tokenize(info.get(field) or ""):
+            terms.add(token)
+            terms.add(f"{field}:{token}")
+    return sorted(terms)
+
+
+def parse_query(query):
+    """(terms, start_date, end_date) from a query string."""
+    terms, start_date, end_date = [], None, None
+    for word in query.lower().split():
+        field, _, value = word.partition(":")
+        if value and field == "from":
+            start_date = value
+        elif value and field == "to":
+            end_date = value
+        elif value and field in SEARCH_FIELDS:
+            terms.extend(f"{field}:{token}" for token in tokenize(value))
+        else:
+            terms.extend(tokenize(word))
+    return terms, start_date, end_date
+
+
+class SearchIndex:
+    def __init__(self, username, base_dir=MATCH_BASE_DIR):
+        self.username = username
+        self.base_dir = base_dir
+        self.folder = os.path.join(base_dir, username)
+        self.path = os.path.join(SEARCH_INDEX_DIR, f"{username}.json")
+        self.files = {}      # session path relative to the user folder -> [mtime, date, terms]
+        self.postings = {}   # term -> set of session names
+        # Sorted terms for prefix lookups, bare and field-qualified kept apart so a
+        # bare word can't prefix-match a qualified term ("role" vs "role:mezzala")
+        self.vocabulary = []
+        self.field_vocabulary = []
+        self.by_date = []    # sorted (date, name)
+        self._stamp = None   # _folder_stamp() as of the last complete refresh
+        self._lock = threading.Lock()
+
+    def load(self, should_stop=None):
+        try:
+            with open(self.path, "r") as f:
+                cached = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            cached = {}
+        self.files = cached.get("files", {}) if cached.get("version") == INDEX_VERSION else {}
+        for name, (_, _, terms) in self.files.items():
+            for term in terms:
+                self.postings.setdefault(term, set()).add(name)
+        self.by_date = sorted((date, name) for name, (_, date, _) in self.files.items())
+        self._build_vocabulary()
+        self.refresh(should_stop)
+        return self
+
+    def _folder_stamp(self):
+        """
+        mtimes of the user's session and patch folders. Sync, sealing and
+        compaction add, remove or replace files there, which moves them.
+        """
+        stamp = []
+        for folder in (self.folder, os.path.join(PATCHES_DIR, self.username)):
+            try:
+                stamp.append(os.stat(folder).st_mtime_ns)
+            except OSError:
+                stamp.append(None)
+        return stamp
+
+    def refresh(self, should_stop=None):
+        """
+        Re-indexes only sessions that are new or changed since the index was written.
+        Returns False if should_stop() cut it short; what was indexed is kept.
+        """
+        with self._lock:
+            stamp = self._folder_stamp()
+            current = {os.path.relpath(p, self.folder): session_mtime(p) for p in list_session_files(self.username, self.base_dir)}
+            changed, complete = False, True
+            for name in list(self.files):
+                if name not in current:
+                    self._remove(name)
+                    changed = True
+            for name, mtime in current.items():
+                entry = self.files.get(name)
+                if entry is None or entry[0] != mtime:
+                    if should_stop is not None and should_stop():
+                        complete = False
+                        break
+                    data = load_session(os.path.join(self.folder, name))
+                    if data is not None:
+                        self._add(name, mtime, data)
+                        changed = True
+            if changed:
+                self._build_vocabulary()
+                self._save()
+            if complete:
+                self._stamp = stamp
+            return complete
+
+    def update(self, name, data):
+        """Indexes one saved or edited session; called from the save paths."""
+        with self._lock:
+            self._add(name, session_mtime(os.path.join(self.folder, name)), data)
+            self._build_vocabulary()
+            self._save()
+
+    def _build_vocabulary(self):
+        terms = sorted(self.postings)
+        self.vocabulary = [t for t in terms if ":" not in t]
+        self.field_vocabulary = [t for t in terms if ":" in t]
+
+    def _add(self, name, mtime, data):
+        self._remove(name)
+        date = (data.get("session_info") or {}).get("date", "")
+        terms = session_terms(data)
+        self.files[name] = [mtime, date, terms]
+        for term in terms:
+            self.postings.setdefault(term, set()).add(name)
+        bisect.insort(self.by_date, (date, name))
+
+    def _remove(self, name):
+        entry = self.files.pop(name, None)
+        if entry is None:
+            return
+        _, date, terms = entry
+        for term in terms:
+            names = self.postings.get(term)
+            if names is not None:
+                names.discard(name)
+                if not names:
+                    del self.postings[term]
+        i = bisect.bisect_left(self.by_date, (date, name))
+        if i < len(self.by_date) and self.by_date[i] == (date, name):
+            del self.by_date[i]
+
+    def _save(self):
+        os.makedirs(SEARCH_INDEX_DIR, exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"version": INDEX_VERSION, "files": self.files}, f)
+        os.replace(tmp_path, self.path)
+
+    def _prefix_matches(self, prefix):
+        """Names of sessions holding any term starting with prefix."""
+        vocabulary = self.field_vocabulary if ":" in prefix else self.vocabulary
+        start = bisect.bisect_left(vocabulary, prefix)
+        end = bisect.bisect_left(vocabulary, prefix + _MAX_CHAR)
+        matches = set()
+        for term in vocabulary[start:end]:
+            matches |= self.postings.get(term, set())
+        return matches
+
+    def search(self, query="", start_date=None, end_date=None, limit=None):
+        """Session names matching every query word, newest first."""
+        terms, query_start, query_end = parse_query(query)
+        start_date, end_date = start_date or query_start, end_date or query_end
+        if self._folder_stamp() != self._stamp:
+            self.refresh()  # written to outside the save paths, or a cut-short prefetch
+        with self._lock:
+            candidates = None
+            if start_date or end_date:
+                lo = bisect.bisect_left(self.by_date, (start_date or "",))
+                hi = bisect.bisect_right(self.by_date, (end_date or _MAX_CHAR, _MAX_CHAR))
+                candidates = {name for _, name in self.by_date[lo:hi]}
+            # Rarest term first keeps the running intersection small
+            for matches in sorted((self._prefix_matches(term) for term in terms), key=len):
+                candidates = matches if candidates is None else candidates & matches
+                if not candidates:
+                    return []
+            if candidates is None:
+                candidates = set(self.files)
+            key = lambda n: (self.files[n][1], n)
+            if limit:
+                return heapq.nlargest(limit, candidates, key=key)
+            return sorted(candidates, key=key, reverse=True)
+
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def get_search_index(username, should_stop=None):
+    with _indexes_lock:
+        index = _indexes.get(username)
+        if index is None:
+            index = _indexes[username] = SearchIndex(username).load(should_stop)
+    return index
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Search a user's sessions by metadata and notes")
+    parser.add_argument("--user", required=True)
+    parser.add_argument("query", nargs="?", default="")
+    args = parser.parse_args()
+    index = get_search_index(args.user)
+    started = time.perf_counter()
+    results = index.search(args.query)
+    elapsed = (time.perf_counter() - started) * 1000
+    for name in results:
+        print(f"{index.files[name][1]}  {name}")
+    print(f"{len(results)} of {len(index.files)} sessions in {elapsed:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,252 @@
+# utils/session_patches.py
+#
+# Edits to saved sessions, stored as small append-only patch records instead
+# of rewriting the session file (which may be sealed inside an archive).
+# utils.helpers.load_session() applies the patches on read and session_mtime()
+# includes the patch log, so every mtime-keyed cache (player history, score
+# cache, hash index) re-reads only the edited session.
+#
+#   python -m utils.session_patches    # fold every patch log into its session
+#
+# Records:  {"op": "set", "index": i, "event": {...}}   replace one event
+#           {"op": "add", "event": {...}}               append a missed event
+#           {"op": "remove", "index": i}
+#           {"op": "info", "fields": {...}}             session_info changes
+#           {"op": "snapshot", "session_info": {...}, "events": [...]}
+import json
+import logging
+import os
+
+from models.match_model import stats_from_events
+
+logger = logging.getLogger(__name__)
+
+PATCHES_DIR = os.path.join("data", "patches")
+COMPACT_EVERY = 50  # patch records folded into the session once this many pile up
+EVENT_KEYS = ('rel_pos', 'rel_end_pos', 'type', 'xg', 'xa')
+EDITABLE_INFO_FIELDS = ('game_type', 'formation', 'position', 'role', 'date', 'time', 'time_played', 'note')
+
+
+def patch_path(session_path):
+    """Patch log of a session under MATCH_BASE_DIR, or None for sessions stored elsewhere."""
+    from utils.helpers import MATCH_BASE_DIR
+    relative = os.path.relpath(session_path, MATCH_BASE_DIR)
+    if relative.startswith(os.pardir):
+        return None
+    username, _, name = relative.partition(os.sep)
+    # Archived sessions are "<archive>/<name>": flatten to one file name
+    return os.path.join(PATCHES_DIR, username, name.replace(os.sep, "%") + ".jsonl")
+
+
+def patch_mtime(session_path):
+    path = patch_path(session_path)
+    try:
+        return os.path.getmtime(path) if path else None
+    except OSError:
+        return None
+
+
+def read_patches(session_path):
+    path = patch_path(session_path)
+    if not path or not os.path.exists(path):
+        return []
+    records = []
+    with open(path, "r") as f:
+        for line in f:
+            try:
+                records.append(json.loads(line))
+            except json.JSONDecodeError:
+                break  # torn final write
+    return records
+
+
+def normalise_event(event):
+    """Event dict with only the saved keys and positions as lists, for comparing and patching."""
+    normalised = {key: event.get(key) for key in EVENT_KEYS}
+    for key in ('rel_pos', 'rel_end_pos'):
+        if normalised[key] is not None:
+            normalised[key] = [normalised[key][0], normalised[key][1]]
+    return normalised
+
+
+def apply_patch_record(data, record):
+    events = data.setdefault("events", [])
+    op = record.get("op")
+    if op == "set":
+        events[record["index"]] = dict(record["event"])
+    elif op == "add":
+        events.append(dict(record["event"]))
+    elif op == "remove":
+        del events[record["index"]]
+    elif op == "info":
+        data.setdefault("session_info", {}).update(record["fields"])
+    elif op == "snapshot":
+        data["session_info"] = dict(record["session_info"])
+        data["events"] = [dict(e) for e in record["events"]]
+
+
+def apply_patches(session_path, data):
+    """Applies the session's patch log to freshly loaded data (in place). Returns True if it had any."""
+    records = read_patches(session_path)
+    if not records or not isinstance(data, dict):
+        return False
+    for record in records:
+        try:
+            apply_patch_record(data, record)
+        except (IndexError, KeyError, TypeError):
+            logger.warning("Skipping bad patch record for %s: %r", session_path, record)
+    data["stats"] = stats_from_events(data["events"])
+    return True
+
+
+def diff_session(old, new):
+    """
+    Patch records turning `old` into `new`. Events are compared by index:
+    the editor changes events in place and only adds or removes at the end.
+    """
+    old_info, new_info = old.get("session_info") or {}, new.get("session_info") or {}
+    old_events = [normalise_event(e) for e in old.get("events") or []]
+    new_events = [normalise_event(e) for e in new.get("events") or []]
+    records = []
+    # A missing field and an empty one ("" from the form) are the same thing
+    fields = {k: new_info[k] for k in EDITABLE_INFO_FIELDS
+              if k in new_info and new_info[k] != old_info.get(k) and (new_info[k] or old_info.get(k))}
+    if fields:
+        records.append({"op": "info", "fields": fields})
+    for i in range(min(len(old_events), len(new_events))):
+        if old_events[i] != new_events[i]:
+            records.append({"op": "set", "index": i, "event": new_events[i]})
+    for i in range(len(old_events) - 1, len(new_events) - 1, -1):
+        records.append({"op": "remove", "index": i})
+    for event in new_events[len(old_events):]:
+        records.append({"op": "add", "event": event})
+    return records
+
+
+def _truncate_torn_tail(path):
+    """Cuts a log back to its last complete record, so appends never land behind a torn line."""
+    good_end = 0
+    with open(path, "rb") as f:
+        for line in f:
+            if not line.endswith(b"\n"):
+                break
+            try:
+                json.loads(line)
+            except json.JSONDecodeError:
+                break
+            good_end += len(line)
+    if good_end < os.path.getsize(path):
+        with open(path, "r+b") as f:
+            f.truncate(good_end)
+
+
+def append_patches(session_path, records):
+    """Appends patch records (fsynced); compacts the log once it reaches COMPACT_EVERY."""
+    path = patch_path(session_path)
+    if path is None:
+        raise ValueError(f"{session_path} is not a saved session")
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    if os.path.exists(path):
+        _truncate_torn_tail(path)
+    with open(path, "a") as f:
+        f.write("".join(json.dumps(r) + "\n" for r in records))
+        f.flush()
+        os.fsync(f.fileno())
+    if len(read_patches(session_path)) >= COMPACT_EVERY:
+        compact(session_path)
+
+
+def _write_json(path, data, **kwargs):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(data, f, **kwargs)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def compact(session_path):
+    """
+    Folds the patch log into the session. Loose files are rewritten; archived
+    sessions keep a one-record snapshot log since the archive is sealed.
+    """
+    from utils.helpers import is_archived, load_session
+    path = patch_path(session_path)
+    data = load_session(session_path, validate=False)
+    if data is None or not path or not os.path.exists(path):
+        return False
+    # The snapshot goes down first: replaying it over an already folded file is harmless
+    _write_snapshot(path, data)
+    if not is_archived(session_path):
+        save_session(session_path, data)
+    return True
+
+
+def _write_snapshot(path, data):
+    """Replaces a patch log with one snapshot record of `data`."""
+    snapshot = {"op": "snapshot", "session_info": data.get("session_info") or {}, "events": data.get("events") or []}
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        f.write(json.dumps(snapshot) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def save_session(session_path, data):
+    """
+    Writes a loose session file atomically and drops its patch log. Every
+    writer of session files goes through here: `data` already has the
+    patches folded in, and replaying them over it would apply them twice.
+    """
+    _write_json(session_path, data, indent=4)
+    discard_patches(session_path)
+
+
+def replace_session(session_path, data):
+    """
+    Stores new content for an existing session, e.g. a pulled sync update.
+    Loose files are rewritten. A sealed session gets a snapshot record in its
+    patch log instead (archives outside matches_history have no patch logs and
+    are re-sealed), so it is never listed twice as archive member plus loose copy.
+    Returns the file whose mtime now stands for the session.
+    """
+    from utils.archive import replace_member, split_member_path
+    member = split_member_path(session_path)
+    if member is None:
+        save_session(session_path, data)
+        return session_path
+    path = patch_path(session_path)
+    if path is None:
+        replace_member(member[0], member[1], data)
+        return member[0]
+    _write_snapshot(path, data)
+    return path
+
+
+def discard_patches(session_path):
+    path = patch_path(session_path)
+    if path:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def main():
+    from utils.helpers import is_archived, list_session_files, list_usernames
+    compacted = 0
+    for username in list_usernames():
+        if not os.path.isdir(os.path.join(PATCHES_DIR, username)):
+            continue
+        for session_path in list_session_files(username):
+            records = read_patches(session_path)
+            already_folded = is_archived(session_path) and len(records) == 1 and records[0].get("op") == "snapshot"
+            if records and not already_folded and compact(session_path):
+                compacted += 1
+    print(f"Compacted {compacted} patched sessions")
+
+
+if __name__ == "__main__":
+    main()
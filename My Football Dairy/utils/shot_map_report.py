@@ -0,0 +1,168 @@
+# utils/shot_map_report.py
+#
+# Headless per-player, per-match shot-map reports: a PNG of the half pitch
+# with every event drawn exactly like HalfPitchWidget draws it (same
+# geometry and marker styles from utils/pitch_geometry.py) plus a summary
+# strip underneath. Sessions are rendered in a process pool, one PNG each.
+#
+#   python -m utils.shot_map_report --date 2025-07-21
+#   python -m utils.shot_map_report --date 2025-07-21 --user t --out reports
+import argparse
+import math
+import os
+from multiprocessing import Pool
+
+from PIL import Image, ImageDraw, ImageFont
+
+from models.match_model import session_stats
+from models.player_model import get_player_history, parse_minutes
+from models.xg_model import load_scored_session
+from utils.helpers import MATCH_BASE_DIR, list_usernames
+from utils.pitch_geometry import (DIRECTION_COLOR, DIRECTION_WIDTH, HALF_PITCH_ASPECT, LINE_COLOR, LINE_WIDTH, MARKER_STYLES, SHOT_OFF_STROKE,
+                                  arrow_head, grass_stripes, half_pitch_markings, star_points)
+
+REPORTS_DIR = os.path.join("data", "reports")
+PITCH_WIDTH = 1020              # px; the pitch height follows from the half-pitch aspect
+UNIT = PITCH_WIDTH / 360.0      # px per dp, so markers look as they do on a ~360dp wide phone
+MARGIN = 12 * UNIT              # room for the goal, drawn below the goal line
+SUMMARY_HEIGHT = 170
+FONT_SIZE = 22
+BACKGROUND = (0.12, 0.12, 0.12, 1)
+TEXT_COLOR = (0.95, 0.95, 0.95, 1)
+
+
+def _rgba(color):
+    return tuple(int(round(c * 255)) for c in color)
+
+
+class _Canvas:
+    """ImageDraw with the y-up coordinates the shared pitch geometry uses."""
+    def __init__(self, draw, height):
+        self.draw, self.height = draw, height
+
+    def _flip(self, points):
+        return [(points[i], self.height - points[i + 1]) for i in range(0, len(points), 2)]
+
+    def line(self, points, color, width):
+        self.draw.line(self._flip(points), fill=_rgba(color), width=max(1, int(round(width))), joint="curve")
+
+    def polygon(self, points, color):
+        self.draw.polygon(self._flip(points), fill=_rgba(color))
+
+    def ellipse(self, cx, cy, r, color):
+        self.draw.ellipse([cx - r, self.height - cy - r, cx + r, self.height - cy + r], fill=_rgba(color))
+
+    def rectangle(self, x, y, w, h, color):
+        self.draw.rectangle([x, self.height - y - h, x + w, self.height - y], fill=_rgba(color))
+
+
+def _draw_marker(canvas, event, x, y, w, h):
+    start = (x + event['rel_pos'][0] * w, y + event['rel_pos'][1] * h)
+    if event.get('rel_end_pos'):
+        end = (x + event['rel_end_pos'][0] * w, y + event['rel_end_pos'][1] * h)
+        if start != end:
+            canvas.line([start[0], start[1], end[0], end[1]], DIRECTION_COLOR, DIRECTION_WIDTH * UNIT)
+            canvas.polygon(arrow_head(start, end, UNIT), DIRECTION_COLOR)
+    if event.get('type') not in MARKER_STYLES:
+        return
+    color, size = MARKER_STYLES[event['type']]
+    d, (cx, cy) = size * UNIT, start
+    if event['type'] == 'goal':
+        canvas.polygon(star_points(cx, cy, d / 2), color)
+    elif event['type'] == 'shot_on':
+        canvas.ellipse(cx, cy, d / 2, color)
+    elif event['type'] == 'shot_off':
+        half = d / 2
+        canvas.line([cx - half, cy - half, cx + half, cy + half], color, SHOT_OFF_STROKE * UNIT)
+        canvas.line([cx - half, cy + half, cx + half, cy - half], color, SHOT_OFF_STROKE * UNIT)
+    elif event['type'] == 'assist':
+        canvas.rectangle(cx - d / 2, cy - d / 2, d, d, color)
+
+
+def _summary_lines(username, data):
+    info = data.get("session_info") or {}
+    stats = session_stats(data)
+    minutes = parse_minutes(info.get("time_played"))
+    return [
+        f"{username}   {info.get('date', '')} {info.get('time', '')[:5]}   {info.get('game_type', '')}",
+        f"{info.get('formation', 'N/A')}   {info.get('position', 'N/A')} / {info.get('role', 'N/A')}"
+        + ("" if math.isnan(minutes) else f"   {minutes:.0f} min"),
+        f"Goals: {stats['goals']}   Assists: {stats['assists']}   Shots: {stats['shots_on_target'] + stats['shots_off_target']}"
+        f" ({stats['shots_on_target']} on target)",
+        f"xG: {stats['total_xg']:.2f}   xA: {stats['total_xa']:.2f}",
+    ]
+
+
+def render_shot_map(username, data):
+    """Returns the report for one session as a PIL image."""
+    pitch_h = PITCH_WIDTH / HALF_PITCH_ASPECT
+    width, height = int(PITCH_WIDTH + 2 * MARGIN), int(pitch_h + 2 * MARGIN + SUMMARY_HEIGHT)
+    image = Image.new("RGBA", (width, height), _rgba(BACKGROUND))
+    canvas = _Canvas(ImageDraw.Draw(image, "RGBA"), height)
+    x, y, w, h = MARGIN, SUMMARY_HEIGHT + MARGIN, PITCH_WIDTH, pitch_h  # summary strip below the goal
+
+    for color, (sx, sy, sw, sh) in grass_stripes(x, y, w, h):
+        canvas.rectangle(sx, sy, sw, sh, color)
+    polylines, dots = half_pitch_markings(x, y, w, h, UNIT)
+    for points in polylines:
+        canvas.line(points, LINE_COLOR, LINE_WIDTH * UNIT)
+    for cx, cy, r in dots:
+        canvas.ellipse(cx, cy, r, LINE_COLOR)
+    for event in data.get("events") or []:
+        _draw_marker(canvas, event, x, y, w, h)
+
+    try:
+        font = ImageFont.load_default(size=FONT_SIZE)
+    except TypeError:  # Pillow < 10.1 only has the fixed bitmap font
+        font = ImageFont.load_default()
+    for i, text in enumerate(_summary_lines(username, data)):
+        canvas.draw.text((MARGIN, height - SUMMARY_HEIGHT + MARGIN + i * 30), text, fill=_rgba(TEXT_COLOR), font=font)
+    return image
+
+
+def _render_one(item):
+    """Worker: renders one session to a PNG. Returns the output path, or None if unreadable."""
+    username, path, out_path = item
+    data = load_scored_session(path)
+    if data is None:
+        return None
+    render_shot_map(username, data).save(out_path, optimize=False)
+    return out_path
+
+
+def matchday_sessions(match_date, usernames=None, base_dir=MATCH_BASE_DIR):
+    """(username, session path) for every session dated match_date, from the cached player histories."""
+    for username in usernames or list_usernames(base_dir):
+        history = get_player_history(username)
+        for name, session_date in zip(history.names, history.dates):
+            if session_date == match_date:
+                yield username, os.path.join(base_dir, username, name)
+
+
+def render_matchday(match_date, out_dir=REPORTS_DIR, usernames=None, workers=None):
+    """Renders every player's sessions on match_date into out_dir/<date>/. Returns the PNG paths."""
+    day_dir = os.path.join(out_dir, match_date)
+    os.makedirs(day_dir, exist_ok=True)
+    items = []
+    for username, path in matchday_sessions(match_date, usernames):
+        stem = os.path.splitext(os.path.basename(path))[0]
+        items.append((username, path, os.path.join(day_dir, f"{username}_{stem}.png")))
+    if not items:
+        return []
+    with Pool(workers) as pool:
+        return [out for out in pool.imap_unordered(_render_one, items) if out]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Render shot-map reports for every player on a matchday")
+    parser.add_argument("--date", required=True, help="YYYY-MM-DD")
+    parser.add_argument("--user", action="append", help="repeatable; default: every user")
+    parser.add_argument("--out", default=REPORTS_DIR)
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+    written = render_matchday(args.date, args.out, args.user, args.workers)
+    print(f"Rendered {len(written)} reports to {os.path.join(args.out, args.date)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,395 @@
+# utils/sync_service.py
+#
+# Local multi-device sync for data/matches_history/.
+#
+#   python -m utils.sync_service serve --port 8765
+#   python -m utils.sync_service sync --host 192.168.1.20 --device laptop
+#
+# Messages are zlib-compressed JSON frames with a 4-byte length prefix.
+# Every stored session gets a server sequence number; each device keeps a
+# watermark (last local mtime pushed and last server seq pulled, per user), so a
+# sync only exchanges sessions that changed since then. Content hashes
+# (models.match_model.session_content_hash, the same ones utils/dedup.py
+# indexes) let both sides skip a match the other already has under another
+# name, e.g. the same session saved on two devices. The hash leaves out the
+# session details (note, minutes, ...), so those are compared alongside it
+# for a session both sides hold under the same name.
+import argparse
+import asyncio
+import json
+import os
+import struct
+import threading
+import time
+import zlib
+
+from models.match_model import session_content_hash
+from utils.dedup import HashIndex, get_hash_index
+from utils.helpers import MATCH_BASE_DIR, list_session_files, list_usernames, load_session, session_mtime
+from utils.session_patches import replace_session
+from utils.validators import validate_session
+
+DEFAULT_PORT = 8765
+SYNC_STATE_DIR = os.path.join("data", "sync")
+UPLOAD_BATCH = 50  # sessions per upload frame
+POOL_SIZE = 4
+HASH_SCHEME = "session_content"  # stamped in the server state; older states hashed whole documents
+
+_HEADER = struct.Struct(">I")
+
+
+async def send_message(writer, message):
+    payload = zlib.compress(json.dumps(message, separators=(",", ":")).encode())
+    writer.write(_HEADER.pack(len(payload)) + payload)
+    await writer.drain()
+
+
+async def read_message(reader):
+    header = await reader.readexactly(_HEADER.size)
+    (length,) = _HEADER.unpack(header)
+    payload = await reader.readexactly(length)
+    return json.loads(zlib.decompress(payload))
+
+
+def _is_safe_name(name):
+    return bool(name) and os.path.basename(name) == name and not name.startswith(".")
+
+
+def _details(data):
+    """The session_info fields an edit can change; the hash covers date, time and events."""
+    info = data.get("session_info") or {}
+    return {k: v for k, v in info.items() if k not in ('session_id', 'xg_model_version')}
+
+
+def _revision(data):
+    return [session_content_hash(data), _details(data)]
+
+
+def _session_paths(base_dir, username):
+    """Session name -> path, including sessions inside sealed archives."""
+    return {os.path.basename(p): p for p in list_session_files(username, base_dir)}
+
+
+def _write_session(base_dir, username, name, data, paths, mtime=None):
+    """
+    Stores one session at its current path from `paths` (_session_paths()), so
+    an update to a sealed session stays in its archive. Returns the path.
+    """
+    path = paths.get(name)
+    if path is None:
+        folder = os.path.join(base_dir, username)
+        os.makedirs(folder, exist_ok=True)
+        path = paths[name] = os.path.join(folder, name)
+    written = replace_session(path, data)  # a pulled copy replaces any local edits not yet pushed
+    if mtime is not None:
+        os.utime(written, (mtime, mtime))
+    return path
+
+
+def _entry_revision(entry):
+    # Entries stored before details were kept have none: always different
+    return [entry[0], entry[3] if len(entry) > 3 else None]
+
+
+class SyncServer:
+    """Stand-in sync server holding the shared copy of matches_history."""
+    def __init__(self, base_dir, host="127.0.0.1", port=DEFAULT_PORT):
+        self.base_dir = base_dir
+        self.host, self.port = host, port
+        self.state_path = os.path.join(base_dir, ".sync_state.json")
+        self.seq = 0
+        self.entries = {}  # username -> {name: [hash, seq, device that stored it, details]}
+        self.server = None
+        self._lock = threading.Lock()  # guards seq/entries: uploads are stored from worker threads
+        self._load_state()
+
+    def _load_state(self):
+        if os.path.exists(self.state_path):
+            with open(self.state_path, "r") as f:
+                state = json.load(f)
+            self.seq, self.entries = state["seq"], state["entries"]
+            if state.get("hash") == HASH_SCHEME:
+                return
+            # Re-hash in place: sequence numbers must not change under the clients' watermarks
+            for username, user_entries in self.entries.items():
+                paths = _session_paths(self.base_dir, username)
+                for name, entry in list(user_entries.items()):
+                    data = load_session(paths[name]) if name in paths else None
+                    if data is None:
+                        del user_entries[name]
+                    else:
+                        user_entries[name] = [session_content_hash(data), entry[1], None, _details(data)]
+            self._save_state()
+            return
+        # First start: index whatever is already on disk
+        for username in list_usernames(self.base_dir):
+            for path in list_session_files(username, self.base_dir):
+                data = load_session(path)
+                if data is not None:
+                    self.seq += 1
+                    self.entries.setdefault(username, {})[os.path.basename(path)] = [session_content_hash(data), self.seq, None, _details(data)]
+        self._save_state()
+
+    def _save_state(self):
+        os.makedirs(self.base_dir, exist_ok=True)
+        tmp_path = self.state_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"hash": HASH_SCHEME, "seq": self.seq, "entries": self.entries}, f)
+        os.replace(tmp_path, self.state_path)
+
+    async def start(self):
+        self.server = await asyncio.start_server(self.handle_client, self.host, self.port)
+        self.port = self.server.sockets[0].getsockname()[1]
+        return self
+
+    async def close(self):
+        if self.server:
+            self.server.close()
+            await self.server.wait_closed()
+
+    async def handle_client(self, reader, writer):
+        try:
+            while True:
+                try:
+                    message = await read_message(reader)
+                except (asyncio.IncompleteReadError, ConnectionResetError):
+                    break
+                await send_message(writer, await self.dispatch(message))
+        finally:
+            writer.close()
+
+    async def dispatch(self, message):
+        op = message.get("op")
+        username = message.get("user", "")
+        if not _is_safe_name(username):
+            return {"error": "invalid user"}
+
+        if op == "have":
+            # A name the server holds is wanted if it differs, unless another device changed it
+            # after this one last pulled (that change is pulled instead: first writer wins);
+            # a new name only if its match isn't here yet
+            since, device = message.get("since", 0), message.get("device")
+            with self._lock:
+                user_entries = self.entries.get(username, {})
+                known_hashes = {entry[0] for entry in user_entries.values()}
+                missing = []
+                for name, revision in message["revisions"].items():
+                    entry = user_entries.get(name)
+                    if not _is_safe_name(name):
+                        continue
+                    if entry is None:
+                        if revision[0] not in known_hashes:
+                            missing.append(name)
+                    elif _entry_revision(entry) != revision and (entry[1] <= since or entry[2] == device):
+                        missing.append(name)
+            return {"missing": missing}
+
+        if op == "upload":
+            # Uploads are imports: anything that fails the session schema is refused
+            sessions = [s for s in message["sessions"]
+                        if _is_safe_name(s["name"]) and not validate_session(s["data"], coerce=True)]
+            seq = await asyncio.to_thread(self._store_sessions, username, sessions, message.get("device"))
+            stored = {s["name"] for s in sessions}
+            return {"seq": seq, "rejected": [s["name"] for s in message["sessions"] if s["name"] not in stored]}
+
+        if op == "changes":
+            since, device = message.get("since", 0), message.get("device")
+            with self._lock:
+                # A device's own uploads aren't sent back to it
+                changed = {name: _entry_revision(entry) for name, entry in self.entries.get(username, {}).items()
+                           if entry[1] > since and (device is None or entry[2] != device)}
+                seq = self.seq
+            return {"seq": seq, "changed": changed}
+
+        if op == "fetch":
+            with self._lock:
+                user_entries = self.entries.get(username, {})
+                names = [n for n in message["names"] if n in user_entries]
+            sessions = await asyncio.to_thread(self._read_sessions, username, names)
+            return {"sessions": sessions}
+
+        return {"error": f"unknown op {op!r}"}
+
+    def _store_sessions(self, username, sessions, device=None):
+        """Writes uploaded sessions, then records them. Returns the new seq."""
+        paths = _session_paths(self.base_dir, username)
+        for session in sessions:
+            _write_session(self.base_dir, username, session["name"], session["data"], paths)
+        with self._lock:
+            user_entries = self.entries.setdefault(username, {})
+            for session in sessions:
+                self.seq += 1
+                user_entries[session["name"]] = [session_content_hash(session["data"]), self.seq, device, _details(session["data"])]
+            self._save_state()
+            return self.seq
+
+    def _read_sessions(self, username, names):
+        paths = _session_paths(self.base_dir, username)
+        return [{"name": name, "data": load_session(paths[name]) if name in paths else None} for name in names]
+
+
+class ConnectionPool:
+    """A fixed set of open connections shared by concurrent requests."""
+    def __init__(self, host, port, size=POOL_SIZE):
+        self.host, self.port, self.size = host, port, size
+        self._idle = asyncio.Queue()
+        self._all = []
+
+    async def open(self):
+        for _ in range(self.size):
+            connection = await asyncio.open_connection(self.host, self.port)
+            self._all.append(connection)
+            self._idle.put_nowait(connection)
+        return self
+
+    async def request(self, message):
+        reader, writer = await self._idle.get()
+        try:
+            await send_message(writer, message)
+            return await read_message(reader)
+        finally:
+            self._idle.put_nowait((reader, writer))
+
+    async def close(self):
+        for _, writer in self._all:
+            writer.close()
+            await writer.wait_closed()
+        self._all = []
+
+
+class SyncClient:
+    """Pushes local sessions changed since the watermark, then pulls remote changes."""
+    def __init__(self, device_id, host="127.0.0.1", port=DEFAULT_PORT, base_dir=MATCH_BASE_DIR, state_dir=SYNC_STATE_DIR):
+        self.device_id = device_id
+        self.host, self.port = host, port
+        self.base_dir = base_dir
+        self.state_dir = state_dir
+        self.state_path = os.path.join(state_dir, f"{device_id}.json")
+        self.watermark = {"local_mtime": {}, "server_seq": {}}
+        if os.path.exists(self.state_path):
+            with open(self.state_path, "r") as f:
+                self.watermark = json.load(f)
+        if not isinstance(self.watermark.get("local_mtime"), dict):
+            # Older watermarks held one push mtime for every user; re-check them all once
+            self.watermark["local_mtime"] = {}
+
+    def _save_watermark(self):
+        os.makedirs(os.path.dirname(self.state_path), exist_ok=True)
+        with open(self.state_path, "w") as f:
+            json.dump(self.watermark, f, indent=4)
+
+    def _hash_index(self, username):
+        """The app's hash index for matches_history; a device-local one for any other folder."""
+        if self.base_dir == MATCH_BASE_DIR:
+            index = get_hash_index(username)
+        else:
+            index = HashIndex(username, self.base_dir, os.path.join(self.state_dir, f"{self.device_id}_hash_index")).load()
+        index.refresh()
+        return index
+
+    def _wanted(self, changed, paths, hash_index):
+        wanted = []
+        for name, revision in changed.items():
+            if name in paths:
+                data = load_session(paths[name])
+                if data is None or _revision(data) != revision:
+                    wanted.append(name)
+            elif hash_index.find(revision[0]) is None:
+                wanted.append(name)
+        return wanted
+
+    def _changed_local_sessions(self, username, since):
+        changed = {}
+        for path in list_session_files(username, self.base_dir):
+            if session_mtime(path) > since:
+                data = load_session(path)
+                if data is not None:
+                    changed[os.path.basename(path)] = data
+        return changed
+
+    async def sync(self, usernames=None):
+        """Returns (uploaded, downloaded) session counts."""
+        usernames = usernames if usernames is not None else list_usernames(self.base_dir)
+        pool = await ConnectionPool(self.host, self.port).open()
+        try:
+            results = await asyncio.gather(*(self._sync_user(pool, u) for u in usernames))
+        finally:
+            await pool.close()
+        self._save_watermark()
+        return sum(r[0] for r in results), sum(r[1] for r in results)
+
+    async def _sync_user(self, pool, username):
+        started = time.time()
+        since_mtime = self.watermark["local_mtime"].get(username, 0.0)
+        since = self.watermark["server_seq"].get(username, 0)
+        local = await asyncio.to_thread(self._changed_local_sessions, username, since_mtime)
+        uploaded = 0
+        if local:
+            revisions = {name: _revision(data) for name, data in local.items()}
+            reply = await pool.request({"op": "have", "user": username, "revisions": revisions,
+                                        "since": since, "device": self.device_id})
+            missing = reply.get("missing", [])
+            batches = [missing[i:i + UPLOAD_BATCH] for i in range(0, len(missing), UPLOAD_BATCH)]
+            replies = await asyncio.gather(*(
+                pool.request({"op": "upload", "user": username, "device": self.device_id,
+                              "sessions": [{"name": n, "data": local[n]} for n in batch]})
+                for batch in batches
+            ))
+            rejected = {name for r in replies for name in r.get("rejected", [])}
+            uploaded = len(missing) - len(rejected)
+
+        reply = await pool.request({"op": "changes", "user": username, "since": since, "device": self.device_id})
+        paths = await asyncio.to_thread(_session_paths, self.base_dir, username)
+        hash_index = await asyncio.to_thread(self._hash_index, username)
+        # Updates to sessions held here are taken if they differ; new ones only if
+        # the match isn't already here under another name
+        wanted = await asyncio.to_thread(self._wanted, reply.get("changed", {}), paths, hash_index)
+        if wanted:
+            fetched = await pool.request({"op": "fetch", "user": username, "names": wanted})
+            for session in fetched.get("sessions", []):
+                if session["data"] is not None:
+                    # Backdated to the push watermark so the next sync doesn't push the pulled copy back
+                    path = await asyncio.to_thread(_write_session, self.base_dir, username, session["name"],
+                                                   session["data"], paths, started)
+                    hash_index.add(os.path.relpath(path, hash_index.folder), session_content_hash(session["data"]))
+                    if self.base_dir == MATCH_BASE_DIR:
+                        from models.team_model import record_saved_session  # needs numpy; the server doesn't
+                        await asyncio.to_thread(record_saved_session, username, path)
+        self.watermark["server_seq"][username] = reply.get("seq", since)
+        # Only a user whose sync got this far moves its push watermark
+        self.watermark["local_mtime"][username] = started
+        return uploaded, len(wanted)
+
+
+async def _serve(args):
+    server = await SyncServer(args.root, args.host, args.port).start()
+    print(f"Sync server listening on {server.host}:{server.port} ({args.root})")
+    await server.server.serve_forever()
+
+
+async def _sync(args):
+    client = SyncClient(args.device, args.host, args.port, args.root)
+    started = time.perf_counter()
+    uploaded, downloaded = await client.sync(args.users or None)
+    print(f"Uploaded {uploaded}, downloaded {downloaded} sessions in {time.perf_counter() - started:.2f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sync matches_history between devices")
+    sub = parser.add_subparsers(dest="command", required=True)
+    serve = sub.add_parser("serve")
+    serve.add_argument("--host", default="0.0.0.0")
+    serve.add_argument("--port", type=int, default=DEFAULT_PORT)
+    serve.add_argument("--root", default=os.path.join("data", "sync_server"))
+    sync = sub.add_parser("sync")
+    sync.add_argument("--device", required=True)
+    sync.add_argument("--host", default="127.0.0.1")
+    sync.add_argument("--port", type=int, default=DEFAULT_PORT)
+    sync.add_argument("--root", default=MATCH_BASE_DIR)
+    sync.add_argument("--users", nargs="*")
+    args = parser.parse_args()
+    asyncio.run(_serve(args) if args.command == "serve" else _sync(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -1 +1,253 @@
-# validators.py
\ No newline at end of file
+# utils/validators.py
+#
+# Schema validation for session files and users.json. Each schema is built
+# once into nested closures at import time, so validating a document is a
+# straight run of type checks with no schema interpretation per call.
+#
+#   python -m utils.validators            # validate everything on disk
+#   python -m utils.validators --coerce   # and rewrite legacy fields on disk
+import argparse
+import json
+import re
+import time
+
+_DATE_RE = re.compile(r"^\d{4}-\d{2}-\d{2}$")
+_TIME_RE = re.compile(r"^\d{2}:\d{2}(:\d{2})?$")
+_EMAIL_RE = re.compile(r"[^@]+@[^@]+\.[^@]+")
+
+EVENT_TYPES = ('shot_on', 'shot_off', 'goal', 'assist')
+
+# Older files: calculated_xg/calculated_xa instead of total_xg/total_xa
+LEGACY_STAT_FIELDS = {"calculated_xg": "total_xg", "calculated_xa": "total_xa"}
+
+MAX_MINUTES_PLAYED = 200  # extra time included
+
+
+# --- Compilers: each returns check(value, path, errors) ---
+
+def _type_name(value):
+    return "null" if value is None else type(value).__name__
+
+
+def string(pattern=None, non_empty=False):
+    def check(value, path, errors):
+        if type(value) is not str:
+            errors.append(f"{path}: expected string, got {_type_name(value)}")
+        elif non_empty and not value:
+            errors.append(f"{path}: must not be empty")
+        elif pattern is not None and not pattern.match(value):
+            errors.append(f"{path}: {value!r} does not match {pattern.pattern}")
+    return check
+
+
+def number(minimum=None, maximum=None):
+    def check(value, path, errors):
+        if type(value) not in (int, float):
+            errors.append(f"{path}: expected number, got {_type_name(value)}")
+        elif (minimum is not None and value < minimum) or (maximum is not None and value > maximum):
+            errors.append(f"{path}: {value} outside [{minimum}, {maximum}]")
+    return check
+
+
+def integer(minimum=0):
+    def check(value, path, errors):
+        if type(value) is not int:
+            errors.append(f"{path}: expected integer, got {_type_name(value)}")
+        elif value < minimum:
+            errors.append(f"{path}: {value} is below {minimum}")
+    return check
+
+
+def enum(*values):
+    allowed = frozenset(values)
+    def check(value, path, errors):
+        if value not in allowed:
+            errors.append(f"{path}: {value!r} is not one of {sorted(allowed)}")
+    return check
+
+
+def nullable(inner, empty_string=False):
+    """Accepts None (and "" if empty_string) as well as whatever `inner` accepts."""
+    def check(value, path, errors):
+        if value is None or (empty_string and value == ""):
+            return
+        inner(value, path, errors)
+    return check
+
+
+def point():
+    coordinate = number(-0.05, 1.05)  # taps right on the pitch edge land slightly outside
+    def check(value, path, errors):
+        if type(value) not in (list, tuple) or len(value) != 2:
+            errors.append(f"{path}: expected [x, y], got {value!r}")
+            return
+        coordinate(value[0], path + "[0]", errors)
+        coordinate(value[1], path + "[1]", errors)
+    return check
+
+
+def array(item):
+    def check(value, path, errors):
+        if type(value) is not list:
+            errors.append(f"{path}: expected list, got {_type_name(value)}")
+            return
+        for i, element in enumerate(value):
+            item(element, f"{path}[{i}]", errors)
+    return check
+
+
+def obj(required=None, optional=None):
+    """Object with required/optional fields; unknown keys are allowed."""
+    required = tuple((required or {}).items())
+    optional = tuple((optional or {}).items())
+    def check(value, path, errors):
+        if type(value) is not dict:
+            errors.append(f"{path}: expected object, got {_type_name(value)}")
+            return
+        for key, field_check in required:
+            if key in value:
+                field_check(value[key], f"{path}.{key}", errors)
+            else:
+                errors.append(f"{path}: missing {key!r}")
+        for key, field_check in optional:
+            if key in value:
+                field_check(value[key], f"{path}.{key}", errors)
+    return check
+
+
+# --- Schemas ---
+
+_check_session = obj(
+    required={
+        "session_info": obj(
+            required={"game_type": string(), "position": string(), "date": string(_DATE_RE), "time": string(_TIME_RE)},
+            optional={
+                "formation": string(), "role": string(), "note": string(),
+                "time_played": nullable(number(0, MAX_MINUTES_PLAYED), empty_string=True),
+                "performance_rating": nullable(number(0, 10)),
+                "xg_model_version": string(non_empty=True),
+                "session_id": string(non_empty=True),
+            },
+        ),
+        "stats": obj(
+            required={
+                "goals": integer(), "assists": integer(),
+                "shots_on_target": integer(), "shots_off_target": integer(),
+                "total_xg": number(0), "total_xa": number(0),
+            },
+            optional={"total_shots": integer()},
+        ),
+        "events": array(obj(
+            required={"rel_pos": point(), "type": enum(*EVENT_TYPES)},
+            optional={"rel_end_pos": nullable(point()), "xg": nullable(number(0, 1)), "xa": nullable(number(0, 1))},
+        )),
+    },
+)
+
+_check_user = obj(required={
+    "username": string(non_empty=True),
+    "email": string(_EMAIL_RE),
+    "password": string(non_empty=True),
+})
+
+_check_users = array(_check_user)
+
+
+def coerce_session(data):
+    """Rewrites legacy fields in place. Returns True if anything changed."""
+    if not isinstance(data, dict):
+        return False
+    changed = False
+    info = data.get("session_info")
+    if isinstance(info, dict) and isinstance(info.get("time_played"), str) and info["time_played"].strip().isdigit():
+        info["time_played"] = int(info["time_played"])  # some older files stored minutes as text
+        changed = True
+    if isinstance(info, dict) and type(info.get("time_played")) in (int, float) and not 0 <= info["time_played"] <= MAX_MINUTES_PLAYED:
+        # A mistyped minutes value only makes minutes unknown; it doesn't cost the session its goals
+        info["time_played"] = ""
+        changed = True
+    stats = data.get("stats")
+    if not isinstance(stats, dict):
+        return changed
+    for old, new in LEGACY_STAT_FIELDS.items():
+        if old in stats:
+            value = stats.pop(old)
+            stats.setdefault(new, value)
+            changed = True
+    return changed
+
+
+def validate_session(data, coerce=False):
+    """Returns a list of error strings (empty if valid). coerce=True upgrades legacy fields first."""
+    if coerce:
+        coerce_session(data)
+    errors = []
+    _check_session(data, "session", errors)
+    return errors
+
+
+def validate_user(user):
+    errors = []
+    _check_user(user, "user", errors)
+    return errors
+
+
+def validate_users(users):
+    errors = []
+    _check_users(users, "users", errors)
+    return errors
+
+
+def validate_session_files(paths, coerce=False):
+    """Bulk validation, e.g. for imports. Returns {path: errors} for the invalid ones."""
+    from utils.helpers import load_session
+    invalid = {}
+    for path in paths:
+        data = load_session(path, validate=False)
+        errors = ["unreadable or truncated JSON"] if data is None else validate_session(data, coerce)
+        if errors:
+            invalid[path] = errors
+    return invalid
+
+
+def main():
+    from utils.helpers import USERS_JSON_PATH, is_archived, list_session_files, list_usernames, load_session
+    from utils.session_patches import save_session
+    parser = argparse.ArgumentParser(description="Validate session files and users.json")
+    parser.add_argument("--coerce", action="store_true", help="rewrite legacy fields in loose session files")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    paths = [p for u in list_usernames() for p in list_session_files(u)]
+    invalid = {}
+    for path in paths:
+        data = load_session(path, validate=False)
+        if data is None:
+            invalid[path] = ["unreadable or truncated JSON"]
+            continue
+        # Validate what the loaders see; --coerce also writes the upgraded fields back
+        changed = coerce_session(data)
+        errors = validate_session(data)
+        if errors:
+            invalid[path] = errors
+        elif changed and args.coerce and not is_archived(path):
+            save_session(path, data)
+    elapsed = time.perf_counter() - started
+
+    try:
+        with open(USERS_JSON_PATH, "r") as f:
+            user_errors = validate_users(json.load(f))
+    except (OSError, json.JSONDecodeError):
+        user_errors = ["users.json unreadable"]
+
+    for path, errors in invalid.items():
+        print(path)
+        for error in errors:
+            print(f"    {error}")
+    for error in user_errors:
+        print(f"users.json: {error}")
+    print(f"Validated {len(paths)} sessions in {elapsed:.2f}s, {len(invalid)} invalid")
+
+
+if __name__ == "__main__":
+    main()